@@ -1,25 +1,131 @@
 import pygame
+import numpy as np
 import os
+import collections
+import functools
+import logging
+import sys
+import wave
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def default_buffer_size():
+    """Pick a mixer buffer size for this platform, overridable via CYPHERCORE_AUDIO_BUFFER"""
+    # 512 causes ALSA underruns on Linux, while Windows handles it fine
+    default = 1024 if sys.platform.startswith('linux') else 512
+    value = os.environ.get('CYPHERCORE_AUDIO_BUFFER')
+    if value is None:
+        return default
+    try:
+        size = int(value)
+    except ValueError:
+        logger.warning("Ignoring invalid CYPHERCORE_AUDIO_BUFFER %r, using %d", value, default)
+        return default
+    
+    # Round down to a power of two within the range mixers accept
+    size = max(256, min(8192, size))
+    return 1 << (size.bit_length() - 1)
+
+
+@functools.lru_cache(maxsize=None)
+def _square_wave(frequency, duration, sample_rate):
+    """Generate a square wave, cached since beeps only use a few fixed settings"""
+    n_samples = int(round(duration * sample_rate))
+    
+    # Half-cycle index in 16.16 fixed point, so the pitch stays exact without float math
+    step = int(round(2 * frequency * (1 << 16) / sample_rate))
+    phase = (np.arange(n_samples, dtype=np.int64) * step) >> 16
+    
+    # The low bit of the half-cycle index selects the sign, so no branch is needed
+    buf = (phase & 1).astype(np.int16) * np.int16(20000) - np.int16(10000)  # Square wave amplitude
+    
+    # The cached array is shared between callers
+    buf.flags.writeable = False
+    return buf
+
 
 class AudioEngine:
     """
     Handles all game audio including music and sound effects
     """
-    def __init__(self):
-        # Initialize pygame mixer if not already done
-        if not pygame.mixer.get_init():
-            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+    # Generated interface sounds that play on the reserved UI channel
+    UI_SOUNDS = ('click', 'success', 'failure')
+    
+    # Reserved mixer channels
+    UI_CHANNEL = 0
+    MUSIC_CHANNEL = 1
+    
+    # Music files smaller than this are decoded up front instead of streamed
+    MUSIC_PRELOAD_LIMIT = 4 * 1024 * 1024
+    
+    def __init__(self, frequency=44100, channels=2, buffer_size=None):
+        # The mixer and generated sounds are set up on first use
+        self._initialized = False
+        
+        # Set when no audio device is available; all playback becomes a no-op
+        self._muted = False
+        
+        # Mixer settings
+        if buffer_size is None:
+            buffer_size = default_buffer_size()
+        self.frequency = frequency
+        self.channels = channels
+        self.buffer_size = buffer_size
         
         # Sound volume levels
         self.music_volume = 0.5
         self.sfx_volume = 0.7
         
-        # Dictionaries to store loaded sounds
+        # Sample rate used for generated beeps (replaced by the mixer's rate on init)
+        self.beep_sample_rate = 22050
+        
+        # Dictionaries to store loaded sounds (sounds are kept in least-recently-played order)
         self.music = {}
-        self.sounds = {}
+        self.sounds = collections.OrderedDict()
+        
+        # Preloaded (non-streamed) music tracks
+        self._music_sounds = {}
+        
+        # Memory budget for sounds loaded from file
+        self._sfx_budget_bytes = 64 * 1024 * 1024
+        self._sfx_bytes = 0
+        self._sound_sizes = {}
+        
+        # Name of the track currently loaded into pygame.mixer.music
+        self._current_music_name = None
+        
+        # Name of the track last started by play_music
+        self._playing_music_name = None
+        self._music_paused = False
+        
+        # The sounds directory is created only when something is written to it
+        self._sounds_dir_ready = False
+    
+    def _ensure_init(self):
+        """Initialize the mixer and generate sounds the first time audio is needed"""
+        if self._initialized:
+            return
+        self._initialized = True
+        
+        # Initialize pygame mixer if not already done
+        if not pygame.mixer.get_init():
+            try:
+                pygame.mixer.init(frequency=self.frequency, size=-16, channels=self.channels, buffer=self.buffer_size)
+            except pygame.error as e:
+                logger.warning("Could not initialize audio, sound is disabled: %s", e)
+                self._muted = True
+                return
         
-        # Create sounds directory if it doesn't exist
-        os.makedirs('sounds', exist_ok=True)
+        # Generate beeps in the mixer's own format so they can be used as raw buffers
+        self.beep_sample_rate, _, self._mixer_channels = pygame.mixer.get_init()
+        
+        # Raise the default 8-channel limit and reserve channels for UI sounds and music
+        pygame.mixer.set_num_channels(16)
+        pygame.mixer.set_reserved(2)
+        self._ui_channel = pygame.mixer.Channel(self.UI_CHANNEL)
+        self._music_channel = pygame.mixer.Channel(self.MUSIC_CHANNEL)
         
         # Generate simple sounds for testing
         self.generate_simple_sounds()
@@ -28,83 +134,219 @@ class AudioEngine:
         """Generate very simple sounds using pygame's built-in capabilities"""
         try:
             # Create a simple click sound
-            click_sound = pygame.mixer.Sound(self.generate_simple_beep(880, 0.05))
-            self.sounds['click'] = click_sound
-            self.sounds['click'].set_volume(self.sfx_volume)
+            self.sounds['click'] = self._get_or_make_beep('click', 880, 0.05)
             
             # Create a simple success sound
-            success_sound = pygame.mixer.Sound(self.generate_simple_beep(440, 0.1))
-            self.sounds['success'] = success_sound
-            self.sounds['success'].set_volume(self.sfx_volume)
+            self.sounds['success'] = self._get_or_make_beep('success', 440, 0.1)
             
             # Create a simple failure sound
-            failure_sound = pygame.mixer.Sound(self.generate_simple_beep(220, 0.2))
-            self.sounds['failure'] = failure_sound
-            self.sounds['failure'].set_volume(self.sfx_volume)
+            self.sounds['failure'] = self._get_or_make_beep('failure', 220, 0.2)
             
         except Exception as e:
-            print(f"Could not generate sounds: {e}")
+            logger.warning("Could not generate sounds: %s", e)
     
-    def generate_simple_beep(self, frequency, duration):
-        """Generate a very simple beep sound"""
-        # This is a very basic sound generator
-        import array
-        import math
+    def _ensure_sounds_dir(self):
+        """Create the sounds directory once, the first time it is needed"""
+        if not self._sounds_dir_ready:
+            os.makedirs('sounds', exist_ok=True)
+            self._sounds_dir_ready = True
+    
+    def _get_or_make_beep(self, name, frequency, duration):
+        """Load a cached beep from disk, generating and caching it first if needed"""
+        path = os.path.join('sounds', f'_beep_{name}_{frequency}_{int(duration * 1000)}.wav')
         
-        sample_rate = 22050
-        n_samples = int(round(duration * sample_rate))
+        if os.path.exists(path):
+            try:
+                return pygame.mixer.Sound(path)
+            except (pygame.error, OSError, EOFError, wave.Error) as e:
+                # Regenerate a truncated or corrupt cache file below
+                logger.warning("Discarding unreadable cached beep %s: %s", path, e)
+        
+        buf = self.generate_simple_beep(frequency, duration)
         
-        # Generate a square wave (very simple)
-        buf = array.array('h', [0] * n_samples)
-        for i in range(n_samples):
-            if int(i / sample_rate * frequency * 2) % 2:
-                buf[i] = 10000  # Square wave amplitude
-            else:
-                buf[i] = -10000
+        # The cache is only an optimization, so a failed write still returns the generated beep
+        try:
+            self._ensure_sounds_dir()
+            # A square wave has only two levels, so the cache stores it as 8-bit PCM
+            # (unsigned, as WAV requires); pygame converts it to the mixer format on load
+            tmp_path = path + '.tmp'
+            with wave.open(tmp_path, 'wb') as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(1)
+                wav_file.setframerate(self.beep_sample_rate)
+                wav_file.writeframes(((buf >> 8) + 128).astype(np.uint8).tobytes())
+            
+            # Only a complete file is moved into place, so an interrupted write can't leave a bad cache entry
+            os.replace(tmp_path, path)
+        except (OSError, wave.Error) as e:
+            logger.warning("Could not cache beep %s: %s", path, e)
         
-        return buf
+        # Interleave the mono samples to match the mixer so pygame doesn't have to convert.
+        # The array is passed through the buffer protocol, avoiding an extra bytes copy.
+        return pygame.mixer.Sound(buffer=np.repeat(buf, self._mixer_channels))
+    
+    def generate_simple_beep(self, frequency, duration):
+        """Generate a very simple beep sound"""
+        return _square_wave(frequency, duration, self.beep_sample_rate)
     
     def load_sound(self, name, file_path):
         """Load a sound effect from file"""
+        self._ensure_init()
+        if self._muted:
+            return
         try:
-            self.sounds[name] = pygame.mixer.Sound(file_path)
-            self.sounds[name].set_volume(self.sfx_volume)
-        except pygame.error as e:
-            print(f"Could not load sound {file_path}: {e}")
+            sound = pygame.mixer.Sound(file_path)
+        except (pygame.error, OSError) as e:
+            logger.warning("Could not load sound %s: %s", file_path, e)
+            return
+        
+        # Replace any previous sound with this name
+        self._sfx_bytes -= self._sound_sizes.pop(name, 0)
+        self.sounds[name] = sound
+        self.sounds.move_to_end(name)
+        
+        # Estimate decoded size as 16-bit samples at the mixer's format
+        size = int(sound.get_length() * self.beep_sample_rate * 2 * self._mixer_channels)
+        self._sound_sizes[name] = size
+        self._sfx_bytes += size
+        
+        self._evict_sounds(keep=name)
+    
+    def _evict_sounds(self, keep):
+        """Drop least recently played sounds until loaded sounds fit the memory budget"""
+        while self._sfx_bytes > self._sfx_budget_bytes:
+            # Only sounds loaded from file count against the budget and can be evicted
+            victim = next((n for n in self.sounds if n in self._sound_sizes and n != keep), None)
+            if victim is None:
+                break
+            del self.sounds[victim]
+            self._sfx_bytes -= self._sound_sizes.pop(victim)
     
-    def load_music(self, name, file_path):
-        """Store music file path for later playing"""
+    def load_music(self, name, file_path, stream=None):
+        """Register a music track, preloading it into memory unless it is streamed
+        
+        If stream is None, files smaller than MUSIC_PRELOAD_LIMIT are preloaded.
+        """
+        self._ensure_init()
+        if self._muted:
+            return
         self.music[name] = file_path
+        self._music_sounds.pop(name, None)
+        
+        # Force a reload if the loaded track's file was replaced
+        if name == self._current_music_name:
+            self._current_music_name = None
+        
+        if stream is None:
+            try:
+                stream = os.path.getsize(file_path) >= self.MUSIC_PRELOAD_LIMIT
+            except OSError:
+                stream = True
+        
+        if not stream:
+            try:
+                self._music_sounds[name] = pygame.mixer.Sound(file_path)
+            except pygame.error as e:
+                # Fall back to streaming through pygame.mixer.music
+                logger.warning("Could not preload music %s: %s", file_path, e)
     
     def play_sound(self, name):
         """Play a sound effect"""
-        if name in self.sounds:
-            self.sounds[name].play()
-        else:
+        self._ensure_init()
+        if self._muted or self.sfx_volume <= 0.0:
+            return
+        sound = self.sounds.get(name)
+        if sound is None:
             # Silent fallback if sound not found
-            pass
+            return
+        self.sounds.move_to_end(name)
+        
+        if name in self.UI_SOUNDS:
+            channel = self._ui_channel
+            channel.play(sound)
+        else:
+            channel = sound.play()
+        
+        # Playing resets the channel volume, so apply the sfx volume afterwards
+        if channel is not None:
+            channel.set_volume(self.sfx_volume)
     
     def play_music(self, name, loops=-1):
         """Play background music"""
-        if name in self.music:
-            try:
-                pygame.mixer.music.load(self.music[name])
-                pygame.mixer.music.set_volume(self.music_volume)
-                pygame.mixer.music.play(loops)
-            except pygame.error as e:
-                print(f"Could not play music {self.music[name]}: {e}")
+        self._ensure_init()
+        if self._muted:
+            return
+        path = self.music.get(name)
+        if path is None:
+            return
+        
+        # Resume a paused track instead of reloading it
+        if name == self._playing_music_name and self._music_paused:
+            pygame.mixer.music.unpause()
+            self._music_channel.unpause()
+            self._music_paused = False
+            return
+        
+        self._playing_music_name = name
+        self._music_paused = False
+        
+        # Preloaded tracks play on the reserved music channel with no decode delay
+        sound = self._music_sounds.get(name)
+        if sound is not None:
+            pygame.mixer.music.stop()
+            self._music_channel.play(sound, loops=loops)
+            self._music_channel.set_volume(self.music_volume)
+            return
+        
+        self._music_channel.stop()
+        try:
+            # Skip reparsing the file if this track is already loaded
+            if name != self._current_music_name:
+                pygame.mixer.music.load(path)
+                self._current_music_name = name
+            pygame.mixer.music.set_volume(self.music_volume)
+            pygame.mixer.music.play(loops)
+        except pygame.error as e:
+            self._current_music_name = None
+            logger.warning("Could not play music %s: %s", path, e)
     
     def stop_music(self):
         """Stop currently playing music"""
+        if not self._initialized or self._muted:
+            return
+        # The track stays loaded so playing it again doesn't reparse the file
         pygame.mixer.music.stop()
+        self._music_channel.stop()
+        self._music_paused = False
+    
+    def pause_music(self):
+        """Pause music so the next play_music call for the same track resumes it"""
+        if not self._initialized or self._muted:
+            return
+        pygame.mixer.music.pause()
+        self._music_channel.pause()
+        self._music_paused = True
     
     def set_music_volume(self, volume):
         """Set music volume (0.0 to 1.0)"""
+        self._ensure_init()
         self.music_volume = max(0.0, min(1.0, volume))
+        if self._muted:
+            return
         pygame.mixer.music.set_volume(self.music_volume)
+        self._music_channel.set_volume(self.music_volume)
     
     def set_sfx_volume(self, volume):
         """Set sound effects volume (0.0 to 1.0)"""
-        self.sfx_volume = max(0.0, min(1.0, volume))
-        for sound in self.sounds.values():
-            sound.set_volume(self.sfx_volume)
+        self._ensure_init()
+        volume = max(0.0, min(1.0, volume))
+        if volume == self.sfx_volume:
+            # Nothing to push to the mixer (e.g. repeated slider events)
+            return
+        self.sfx_volume = volume
+        if self._muted:
+            return
+        # Sfx volume lives on the mixer channels, so this is O(channels) not O(sounds)
+        for i in range(pygame.mixer.get_num_channels()):
+            if i != self.MUSIC_CHANNEL:
+                pygame.mixer.Channel(i).set_volume(self.sfx_volume)
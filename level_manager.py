@@ -1,15 +1,61 @@
 import pygame
 import random
-import math
+import collections
+import numpy as np
 from abc import ABC, abstractmethod
 
+# Gate operations on bitpacked truth tables (one bit per input assignment);
+# callers mask the result to the table width
+GATE_OPS = {
+    'AND': lambda a, b: a & b,
+    'OR': lambda a, b: a | b,
+    'XOR': lambda a, b: a ^ b,
+    'NAND': lambda a, b: ~(a & b),
+    'NOT': lambda a: ~a
+}
+
+# The four grid directions (right, down, left, up)
+_DIRS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
 class Puzzle(ABC):
     """Abstract base class for all puzzle levels"""
+    # True if render() paints every pixel, so anything drawn beneath it is wasted
+    OPAQUE_BACKGROUND = False
+    
     def __init__(self, screen_width, screen_height):
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.completed = False
         self.font = pygame.font.SysFont('consolas', 20)
+        self._text_cache = {}
+        
+        # Bands at the top and bottom of the screen that hold the timer and status messages
+        self.status_rects = [
+            pygame.Rect(0, 0, screen_width, 100),
+            pygame.Rect(0, screen_height - 100, screen_width, 100)
+        ]
+    
+    def render_text(self, slot, text, color, font=None):
+        """Render text, reusing the previous surface for this slot if nothing changed"""
+        cached = self._text_cache.get(slot)
+        if cached is not None and cached[0] == text and cached[1] == color:
+            return cached[2]
+        
+        text_surface = (font or self.font).render(text, True, color)
+        self._text_cache[slot] = (text, color, text_surface)
+        return text_surface
+    
+    def handle_events(self, events):
+        """Handle one frame's batch of events, keeping only the last mouse motion"""
+        # Puzzles read the live mouse position, so earlier motion events are redundant
+        last_motion = None
+        for event in events:
+            if event.type == pygame.MOUSEMOTION:
+                last_motion = event
+        
+        for event in events:
+            if event.type != pygame.MOUSEMOTION or event is last_motion:
+                self.handle_event(event)
     
     @abstractmethod
     def handle_event(self, event):
@@ -29,54 +75,80 @@ class Puzzle(ABC):
     def is_completed(self):
         """Check if puzzle is completed"""
         return self.completed
+    
+    def take_dirty_rects(self):
+        """Return the screen areas changed since the last call, or None if the whole screen may have"""
+        return None
 
 
 class BinaryMaze(Puzzle):
     """Level 1: Binary Maze puzzle"""
+    # Shared generator so regenerating a maze doesn't reseed
+    _rng = np.random.default_rng()
+    
     def __init__(self, screen_width, screen_height):
         super().__init__(screen_width, screen_height)
         self.grid_size = 20  # Increased from 15 to 20
         self.cell_size = 25  # Decreased to fit larger grid
+        
+        # Grid offset to center it, and the screen position of each row/column
+        self.offset_x = (self.screen_width - self.grid_size * self.cell_size) // 2
+        self.offset_y = (self.screen_height - self.grid_size * self.cell_size) // 2
+        self._px_x = [self.offset_x + j * self.cell_size for j in range(self.grid_size)]
+        self._px_y = [self.offset_y + i * self.cell_size for i in range(self.grid_size)]
         self.grid = self.generate_maze()
         self.player_pos = [0, 0]  # Start position
         self.exit_pos = [self.grid_size-1, self.grid_size-1]  # End position
         self.time_limit = 300  # Increased to 5 minutes
         self.start_time = pygame.time.get_ticks()
         self.path_hint = self.generate_path_hint()
+        self.path_hint_set = set((pos[0], pos[1]) for pos in self.path_hint)
+        
+        # The grid never changes after generation, so draw it once
+        self._bake_maze_surface()
+        self._instr_surf = self.font.render("Use arrow keys to navigate the binary maze", True, (0, 255, 0))
         
         # Trap mechanics
         self.trap_tiles = []
+        self._trap_flat_set = frozenset()
         self.generate_traps()
         self.trap_triggered = False
         self.trap_time = 0
         self.trap_penalty = 5000  # 5 second penalty
         
         # Player history for reset mechanics
-        self.player_history = [self.player_pos.copy()]
         self.max_history = 10  # Remember last 10 positions
+        self.player_history = collections.deque([self.player_pos.copy()], maxlen=self.max_history)
         
         # Visual effects
         self.flash_effect = False
         self.flash_time = 0
         self.flash_duration = 500  # milliseconds
+        self._flash_surface = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
+        
+        # Persistent rects for the player and exit markers
+        marker_size = self.cell_size - 10
+        self.player_rect = pygame.Rect(0, 0, marker_size, marker_size)
+        self.exit_rect = pygame.Rect(self._px_x[self.exit_pos[1]] + 5, self._px_y[self.exit_pos[0]] + 5, marker_size, marker_size)
+        self._player_surf = pygame.Surface((marker_size, marker_size))
+        self._player_surf.fill((0, 255, 0))
+        self._exit_surf = pygame.Surface((marker_size, marker_size))
+        self._exit_surf.fill((0, 100, 255))
+        self._sync_player_rect()
+    
+    def _sync_player_rect(self):
+        """Move the player rect to match player_pos"""
+        self.player_rect.x = self._px_x[self.player_pos[1]] + 5
+        self.player_rect.y = self._px_y[self.player_pos[0]] + 5
     
     def generate_maze(self):
         """Generate a more complex binary maze"""
-        import random
-        grid = []
+        # Create a base grid with more walls (1) than open paths (0): 40% chance of wall
+        grid = (self._rng.random((self.grid_size, self.grid_size)) < 0.4).astype(np.uint8)
         
-        # Create a base grid with more walls
-        for i in range(self.grid_size):
-            row = []
-            for j in range(self.grid_size):
-                # Create a maze with more walls (1) than open paths (0)
-                # Ensure start and end are always open
-                if (i == 0 and j == 0) or (i == self.grid_size-1 and j == self.grid_size-1):
-                    row.append(0)
-                else:
-                    # 40% chance of wall
-                    row.append(1 if random.random() < 0.4 else 0)
-            grid.append(row)
+        # Ensure start and end are always open
+        grid[0, 0] = 0
+        grid[-1, -1] = 0
         
         # Ensure there's a path from start to end
         self.ensure_path(grid)
@@ -108,70 +180,109 @@ class BinaryMaze(Puzzle):
                     current_pos[0] -= 1
             
             # Clear the current position
-            grid[current_pos[0]][current_pos[1]] = 0
+            grid[current_pos[0], current_pos[1]] = 0
             
             # Sometimes create a branch path
             if random.random() < 0.2:
                 branch_pos = current_pos.copy()
                 
                 # Choose a random direction for the branch
-                direction = random.choice([(0, 1), (1, 0), (0, -1), (-1, 0)])
+                direction = random.choice(_DIRS)
                 branch_pos[0] += direction[0]
                 branch_pos[1] += direction[1]
                 
                 # Make sure branch is within bounds
                 if (0 <= branch_pos[0] < self.grid_size and 
                     0 <= branch_pos[1] < self.grid_size):
-                    grid[branch_pos[0]][branch_pos[1]] = 0
+                    grid[branch_pos[0], branch_pos[1]] = 0
     
     def generate_path_hint(self):
         """Generate a path from start to end for hints"""
-        # In a real game, this would use A* or similar algorithm
-        path = []
-        current = [0, 0]
-        visited = set()
-        visited.add((current[0], current[1]))
-        
-        # Simple breadth-first search
-        queue = [[current]]
+        start = (0, 0)
+        goal = (self.exit_pos[0], self.exit_pos[1])
+        return self._search_path(start, goal)
+    
+    def _search_path(self, start, goal):
+        """Breadth-first search for the shortest open path from start to goal"""
+        # Record each cell's parent instead of copying paths
+        came_from = {start: None}
+        queue = collections.deque([start])
         while queue:
-            path = queue.pop(0)
-            current = path[-1]
+            current = queue.popleft()
             
             # Check if we've reached the exit
-            if current == self.exit_pos:
+            if current == goal:
+                # Walk the parents back to the start to rebuild the path
+                path = []
+                while current is not None:
+                    path.append([current[0], current[1]])
+                    current = came_from[current]
+                path.reverse()
                 return path
             
             # Try all four directions
-            for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
+            for dx, dy in _DIRS:
                 nx, ny = current[0] + dx, current[1] + dy
                 
                 # Check if the new position is valid
                 if (0 <= nx < self.grid_size and 
                     0 <= ny < self.grid_size and 
-                    self.grid[nx][ny] == 0 and
-                    (nx, ny) not in visited):
+                    self.grid[nx, ny] == 0 and
+                    (nx, ny) not in came_from):
                     
-                    new_path = list(path)
-                    new_path.append([nx, ny])
-                    queue.append(new_path)
-                    visited.add((nx, ny))
+                    came_from[(nx, ny)] = current
+                    queue.append((nx, ny))
         
         # If no path found, return a simple path
         return [[0, 0], [self.grid_size-1, self.grid_size-1]]
     
+    def _bake_maze_surface(self):
+        """Pre-render the static grid and the path hint overlay to surfaces"""
+        size = self.grid_size * self.cell_size
+        self.maze_surface = pygame.Surface((size, size))
+        self.hint_surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        
+        # Render each digit glyph once
+        self._digit_surfs = [self.font.render(str(value), True, (0, 255, 0)) for value in (0, 1)]
+        
+        for i in range(self.grid_size):
+            for j in range(self.grid_size):
+                cell_color = (0, 0, 0) if self.grid[i, j] == 1 else (20, 20, 20)
+                self._draw_cell(self.maze_surface, i, j, cell_color)
+                
+                # Hint cells are drawn fully highlighted; render() fades them with set_alpha
+                if (i, j) in self.path_hint_set:
+                    self._draw_cell(self.hint_surface, i, j, (0, 85, 0))
+    
+    def _draw_cell(self, target, i, j, cell_color):
+        """Draw a single maze cell with its border and binary value"""
+        cell_rect = (j * self.cell_size, i * self.cell_size, self.cell_size, self.cell_size)
+        
+        # Draw cell
+        pygame.draw.rect(target, cell_color, cell_rect)
+        
+        # Draw cell border
+        pygame.draw.rect(target, (0, 50, 0), cell_rect, 1)
+        
+        # Draw binary value
+        text = self._digit_surfs[self.grid[i, j]]
+        target.blit(
+            text, 
+            (j * self.cell_size + self.cell_size // 2 - text.get_width() // 2, 
+             i * self.cell_size + self.cell_size // 2 - text.get_height() // 2)
+        )
+    
     def generate_traps(self):
         """Generate trap tiles that penalize the player"""
-        import random
-        
         # Clear existing traps
         self.trap_tiles = []
+        trap_flat = set()
         
         # Number of traps scales with grid size
         num_traps = self.grid_size // 2
         
         # Place traps on open tiles, avoiding start, end, and the hint path
-        safe_tiles = set((pos[0], pos[1]) for pos in self.path_hint)
+        safe_tiles = set(self.path_hint_set)
         safe_tiles.add((0, 0))  # Start
         safe_tiles.add((self.grid_size-1, self.grid_size-1))  # End
         
@@ -182,12 +293,29 @@ class BinaryMaze(Puzzle):
                 y = random.randint(0, self.grid_size-1)
                 
                 # Check if this is a valid trap location
-                if (self.grid[x][y] == 0 and  # Open tile
+                if (self.grid[x, y] == 0 and  # Open tile
                     (x, y) not in safe_tiles and  # Not on safe path
-                    [x, y] not in self.trap_tiles):  # Not already a trap
+                    x * self.grid_size + y not in trap_flat):  # Not already a trap
                     
                     self.trap_tiles.append([x, y])
+                    trap_flat.add(x * self.grid_size + y)
                     break
+        
+        # Traps are keyed by flat index (row * grid_size + col) for single-int lookups
+        self._trap_flat_set = frozenset(trap_flat)
+        
+        # Stamp all trap borders onto one overlay so render() needs a single blit
+        size = self.grid_size * self.cell_size
+        self.trap_overlay = pygame.Surface((size, size), pygame.SRCALPHA)
+        for trap in self.trap_tiles:
+            pygame.draw.rect(
+                self.trap_overlay, 
+                (50, 0, 0),  # Dark red
+                (trap[1] * self.cell_size, 
+                 trap[0] * self.cell_size, 
+                 self.cell_size, self.cell_size),
+                1  # Border only
+            )
     
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
@@ -209,18 +337,17 @@ class BinaryMaze(Puzzle):
             # Check if the new position is valid
             if (0 <= new_pos[0] < self.grid_size and 
                 0 <= new_pos[1] < self.grid_size and
-                self.grid[new_pos[0]][new_pos[1]] == 0):
+                self.grid[new_pos[0], new_pos[1]] == 0):
                 
                 # Update player position
                 self.player_pos = new_pos
+                self._sync_player_rect()
                 
-                # Add to history
+                # Add to history (the deque drops the oldest entry itself)
                 self.player_history.append(self.player_pos.copy())
-                if len(self.player_history) > self.max_history:
-                    self.player_history.pop(0)
                 
                 # Check if player stepped on a trap
-                if self.player_pos in self.trap_tiles:
+                if new_pos[0] * self.grid_size + new_pos[1] in self._trap_flat_set:
                     self.trigger_trap()
     
     def trigger_trap(self):
@@ -228,141 +355,96 @@ class BinaryMaze(Puzzle):
         self.trap_triggered = True
         self.trap_time = pygame.time.get_ticks()
         self.flash_effect = True
-        self.flash_time = pygame.time.get_ticks()
+        self.flash_time = self.trap_time
         
         # Reset player to previous safe position if available
         if len(self.player_history) > 1:
             # Go back 2 positions (current + previous)
             self.player_pos = self.player_history[-2].copy()
+            self._sync_player_rect()
     
     def update(self):
         # Check if player reached the exit
         if self.player_pos == self.exit_pos:
             self.completed = True
         
+        # Sample the clock once for this update
+        now = pygame.time.get_ticks()
+        
         # Update trap status
         if self.trap_triggered:
-            if pygame.time.get_ticks() - self.trap_time >= self.trap_penalty:
+            if now - self.trap_time >= self.trap_penalty:
                 self.trap_triggered = False
         
         # Update flash effect
         if self.flash_effect:
-            if pygame.time.get_ticks() - self.flash_time >= self.flash_duration:
+            if now - self.flash_time >= self.flash_duration:
                 self.flash_effect = False
                 
         # No time limit check - let player continue indefinitely
     
     def render(self, surface):
-        # Calculate grid offset to center it
-        offset_x = (self.screen_width - self.grid_size * self.cell_size) // 2
-        offset_y = (self.screen_height - self.grid_size * self.cell_size) // 2
+        offset_x, offset_y = self.offset_x, self.offset_y
         
-        # Draw grid
-        for i in range(self.grid_size):
-            for j in range(self.grid_size):
-                cell_color = (0, 0, 0) if self.grid[i][j] == 1 else (20, 20, 20)
-                
-                # Highlight path hint (fading based on time)
-                elapsed_time = (pygame.time.get_ticks() - self.start_time) / 1000
-                if [i, j] in self.path_hint and elapsed_time < 5:  # Reduced from 10 to 5 seconds
-                    hint_alpha = max(0, 255 - int(elapsed_time * 51))  # Fade twice as fast
-                    cell_color = (0, hint_alpha // 3, 0)
-                
-                # Draw cell
-                pygame.draw.rect(
-                    surface, 
-                    cell_color, 
-                    (offset_x + j * self.cell_size, 
-                     offset_y + i * self.cell_size, 
-                     self.cell_size, self.cell_size)
-                )
-                
-                # Draw cell border
-                pygame.draw.rect(
-                    surface, 
-                    (0, 50, 0), 
-                    (offset_x + j * self.cell_size, 
-                     offset_y + i * self.cell_size, 
-                     self.cell_size, self.cell_size),
-                    1
-                )
-                
-                # Draw binary value
-                if self.grid[i][j] == 0 or self.grid[i][j] == 1:
-                    text = self.font.render(str(self.grid[i][j]), True, (0, 255, 0))
-                    surface.blit(
-                        text, 
-                        (offset_x + j * self.cell_size + self.cell_size // 2 - text.get_width() // 2, 
-                         offset_y + i * self.cell_size + self.cell_size // 2 - text.get_height() // 2)
-                    )
-        
-        # Draw traps (subtle indication)
-        for trap in self.trap_tiles:
-            # Only show traps after the hint time has passed
-            elapsed_time = (pygame.time.get_ticks() - self.start_time) / 1000
-            if elapsed_time > 5:  # After hint fades
-                pygame.draw.rect(
-                    surface, 
-                    (50, 0, 0),  # Dark red
-                    (offset_x + trap[1] * self.cell_size, 
-                     offset_y + trap[0] * self.cell_size, 
-                     self.cell_size, self.cell_size),
-                    1  # Border only
-                )
+        # Collect the grid, overlays and markers so they go out in one blits call
+        blit_list = [(self.maze_surface, (offset_x, offset_y))]
         
-        # Draw player
-        pygame.draw.rect(
-            surface, 
-            (0, 255, 0), 
-            (offset_x + self.player_pos[1] * self.cell_size + 5, 
-             offset_y + self.player_pos[0] * self.cell_size + 5, 
-             self.cell_size - 10, self.cell_size - 10)
-        )
+        # Sample the clock once; every fade and timer below uses the same frame time
+        now = pygame.time.get_ticks()
+        elapsed_time = (now - self.start_time) / 1000
         
-        # Draw exit
-        pygame.draw.rect(
-            surface, 
-            (0, 100, 255), 
-            (offset_x + self.exit_pos[1] * self.cell_size + 5, 
-             offset_y + self.exit_pos[0] * self.cell_size + 5, 
-             self.cell_size - 10, self.cell_size - 10)
-        )
+        # Highlight path hint (fading based on time)
+        if elapsed_time < 5:  # Reduced from 10 to 5 seconds
+            hint_alpha = max(0, 255 - int(elapsed_time * 51))  # Fade twice as fast
+            self.hint_surface.set_alpha(hint_alpha)
+            blit_list.append((self.hint_surface, (offset_x, offset_y)))
+        
+        # Draw traps (subtle indication), only after the hint time has passed
+        if elapsed_time > 5:  # After hint fades
+            blit_list.append((self.trap_overlay, (offset_x, offset_y)))
+        
+        # Draw player and exit
+        blit_list.append((self._player_surf, self.player_rect))
+        blit_list.append((self._exit_surf, self.exit_rect))
+        
+        surface.blits(blit_list, doreturn=0)
         
         # Draw timer - only show if less than 60 seconds remaining
-        elapsed_time = (pygame.time.get_ticks() - self.start_time) / 1000
         time_left = max(0, self.time_limit - elapsed_time)
         
+        # Text is only re-rendered when the displayed second changes
         if time_left < 60:
-            timer_text = self.font.render(f"Time: {int(time_left)}s", True, (255, 50, 50))
+            timer_text = self.render_text('timer', f"Time: {int(time_left)}s", (255, 50, 50))
         else:
             # Show minutes and seconds for longer timers
             minutes = int(time_left) // 60
             seconds = int(time_left) % 60
-            timer_text = self.font.render(f"Time: {minutes}:{seconds:02d}", True, (0, 255, 0))
+            timer_text = self.render_text('timer', f"Time: {minutes}:{seconds:02d}", (0, 255, 0))
         
         surface.blit(timer_text, (20, 20))
         
         # Draw trap penalty indicator
         if self.trap_triggered:
-            penalty_left = (self.trap_penalty - (pygame.time.get_ticks() - self.trap_time)) / 1000
+            penalty_left = (self.trap_penalty - (now - self.trap_time)) / 1000
             if penalty_left > 0:
-                penalty_text = self.font.render(f"TRAP! Penalty: {penalty_left:.1f}s", True, (255, 0, 0))
+                penalty_text = self.render_text('penalty', f"TRAP! Penalty: {penalty_left:.1f}s", (255, 0, 0))
                 surface.blit(penalty_text, (20, 50))
         
         # Flash effect when trap is triggered
         if self.flash_effect:
-            flash_surface = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
-            alpha = 128 * (1 - (pygame.time.get_ticks() - self.flash_time) / self.flash_duration)
-            flash_surface.fill((255, 0, 0, int(alpha)))
-            surface.blit(flash_surface, (0, 0))
+            alpha = 128 * (1 - (now - self.flash_time) / self.flash_duration)
+            self._flash_surface.fill((255, 0, 0, max(0, int(alpha))))
+            surface.blit(self._flash_surface, (0, 0))
         
         # Draw instructions
-        instr_text = self.font.render("Use arrow keys to navigate the binary maze", True, (0, 255, 0))
-        surface.blit(instr_text, (20, self.screen_height - 40))
+        surface.blit(self._instr_surf, (20, self.screen_height - 40))
 
 
 class LogicGatePuzzle(Puzzle):
     """Level 2: Logic Gate Puzzle"""
+    # render() fills the whole screen
+    OPAQUE_BACKGROUND = True
+    
     def __init__(self, screen_width, screen_height):
         super().__init__(screen_width, screen_height)
         self.completed = False
@@ -379,6 +461,12 @@ class LogicGatePuzzle(Puzzle):
         self.dragging = False
         self.drag_offset = (0, 0)
         
+        # Set when an input changes; the circuit is re-evaluated once in update()
+        self._dirty_logic = False
+        
+        # Set when a toggle or drag changes the circuit's drawing (and for the first frame)
+        self._layout_changed = True
+        
         # Level state
         self.level_complete = False
         self.level_failed = False
@@ -504,92 +592,35 @@ class LogicGatePuzzle(Puzzle):
         
         self.outputs = [output]
         
+        # Give every component a stable id for wiring
+        self.assign_component_ids()
+        
         # Define initial wires
         self.wires = [
             # Connect input A to AND gate 1 input 1
-            {
-                'from_component': input1,
-                'to_component': and_gate1,
-                'from_pos': input1['output_pos'],
-                'to_pos': and_gate1['input_pos'][0],
-                'value': 0
-            },
+            self._wire(input1, and_gate1, 0),
             # Connect input B to AND gate 1 input 2
-            {
-                'from_component': input2,
-                'to_component': and_gate1,
-                'from_pos': input2['output_pos'],
-                'to_pos': and_gate1['input_pos'][1],
-                'value': 0
-            },
+            self._wire(input2, and_gate1, 1),
             # Connect input C to OR gate input 1
-            {
-                'from_component': input3,
-                'to_component': or_gate,
-                'from_pos': input3['output_pos'],
-                'to_pos': or_gate['input_pos'][0],
-                'value': 0
-            },
+            self._wire(input3, or_gate, 0),
             # Connect input D to OR gate input 2
-            {
-                'from_component': input4,
-                'to_component': or_gate,
-                'from_pos': input4['output_pos'],
-                'to_pos': or_gate['input_pos'][1],
-                'value': 0
-            },
+            self._wire(input4, or_gate, 1),
             # Connect AND gate 1 output to NOT gate input
-            {
-                'from_component': and_gate1,
-                'to_component': not_gate,
-                'from_pos': and_gate1['output_pos'],
-                'to_pos': not_gate['input_pos'][0],
-                'value': 0
-            },
+            self._wire(and_gate1, not_gate, 0),
             # Connect OR gate output to XOR gate input 1
-            {
-                'from_component': or_gate,
-                'to_component': xor_gate,
-                'from_pos': or_gate['output_pos'],
-                'to_pos': xor_gate['input_pos'][0],
-                'value': 0
-            },
+            self._wire(or_gate, xor_gate, 0),
             # Connect NOT gate output to XOR gate input 2
-            {
-                'from_component': not_gate,
-                'to_component': xor_gate,
-                'from_pos': not_gate['output_pos'],
-                'to_pos': xor_gate['input_pos'][1],
-                'value': 0
-            },
+            self._wire(not_gate, xor_gate, 1),
             # Connect NOT gate output to AND gate 2 input 1
-            {
-                'from_component': not_gate,
-                'to_component': and_gate2,
-                'from_pos': not_gate['output_pos'],
-                'to_pos': and_gate2['input_pos'][0],
-                'value': 0
-            },
+            self._wire(not_gate, and_gate2, 0),
             # Connect XOR gate output to AND gate 2 input 2
-            {
-                'from_component': xor_gate,
-                'to_component': and_gate2,
-                'from_pos': xor_gate['output_pos'],
-                'to_pos': and_gate2['input_pos'][1],
-                'value': 0
-            },
+            self._wire(xor_gate, and_gate2, 1),
             # Connect AND gate 2 output to final output
-            {
-                'from_component': and_gate2,
-                'to_component': output,
-                'from_pos': and_gate2['output_pos'],
-                'to_pos': output['input_pos'],
-                'value': 0
-            }
+            self._wire(and_gate2, output)
         ]
         
-        # Update component inputs based on wires
-        self.update_component_inputs()
+        # Update component inputs and evaluation order based on wires
+        self.build_circuit()
     
     def generate_puzzle_2(self):
         """Generate the second logic gate puzzle variant - NAND implementation"""
@@ -691,84 +722,33 @@ class LogicGatePuzzle(Puzzle):
         
         self.outputs = [output]
         
+        # Give every component a stable id for wiring
+        self.assign_component_ids()
+        
         # Define wires for NAND implementation
         self.wires = [
             # Connect input A to AND gate 1 input 1
-            {
-                'from_component': input1,
-                'to_component': and_gate1,
-                'from_pos': input1['output_pos'],
-                'to_pos': and_gate1['input_pos'][0],
-                'value': 0
-            },
+            self._wire(input1, and_gate1, 0),
             # Connect input B to AND gate 1 input 2
-            {
-                'from_component': input2,
-                'to_component': and_gate1,
-                'from_pos': input2['output_pos'],
-                'to_pos': and_gate1['input_pos'][1],
-                'value': 0
-            },
+            self._wire(input2, and_gate1, 1),
             # Connect AND gate 1 to NOT gate 1 (creating NAND)
-            {
-                'from_component': and_gate1,
-                'to_component': not_gate1,
-                'from_pos': and_gate1['output_pos'],
-                'to_pos': not_gate1['input_pos'][0],
-                'value': 0
-            },
+            self._wire(and_gate1, not_gate1, 0),
             # Connect input B to AND gate 2 input 1
-            {
-                'from_component': input2,
-                'to_component': and_gate2,
-                'from_pos': input2['output_pos'],
-                'to_pos': and_gate2['input_pos'][0],
-                'value': 0
-            },
+            self._wire(input2, and_gate2, 0),
             # Connect input C to AND gate 2 input 2
-            {
-                'from_component': input3,
-                'to_component': and_gate2,
-                'from_pos': input3['output_pos'],
-                'to_pos': and_gate2['input_pos'][1],
-                'value': 0
-            },
+            self._wire(input3, and_gate2, 1),
             # Connect AND gate 2 to NOT gate 2 (creating NAND)
-            {
-                'from_component': and_gate2,
-                'to_component': not_gate2,
-                'from_pos': and_gate2['output_pos'],
-                'to_pos': not_gate2['input_pos'][0],
-                'value': 0
-            },
+            self._wire(and_gate2, not_gate2, 0),
             # Connect NOT gate 1 to OR gate input 1
-            {
-                'from_component': not_gate1,
-                'to_component': or_gate,
-                'from_pos': not_gate1['output_pos'],
-                'to_pos': or_gate['input_pos'][0],
-                'value': 0
-            },
+            self._wire(not_gate1, or_gate, 0),
             # Connect NOT gate 2 to OR gate input 2
-            {
-                'from_component': not_gate2,
-                'to_component': or_gate,
-                'from_pos': not_gate2['output_pos'],
-                'to_pos': or_gate['input_pos'][1],
-                'value': 0
-            },
+            self._wire(not_gate2, or_gate, 1),
             # Connect OR gate to output
-            {
-                'from_component': or_gate,
-                'to_component': output,
-                'from_pos': or_gate['output_pos'],
-                'to_pos': output['input_pos'],
-                'value': 0
-            }
+            self._wire(or_gate, output)
         ]
         
-        # Update component inputs based on wires
-        self.update_component_inputs()
+        # Update component inputs and evaluation order based on wires
+        self.build_circuit()
     
     def generate_puzzle_3(self):
         """Generate the third logic gate puzzle variant - XOR-based circuit"""
@@ -850,132 +830,139 @@ class LogicGatePuzzle(Puzzle):
         
         self.outputs = [output]
         
+        # Give every component a stable id for wiring
+        self.assign_component_ids()
+        
         # Define wires for XOR-based circuit
         self.wires = [
             # Connect input A to XOR gate 1 input 1
-            {
-                'from_component': input1,
-                'to_component': xor_gate1,
-                'from_pos': input1['output_pos'],
-                'to_pos': xor_gate1['input_pos'][0],
-                'value': 0
-            },
+            self._wire(input1, xor_gate1, 0),
             # Connect input B to XOR gate 1 input 2
-            {
-                'from_component': input2,
-                'to_component': xor_gate1,
-                'from_pos': input2['output_pos'],
-                'to_pos': xor_gate1['input_pos'][1],
-                'value': 0
-            },
+            self._wire(input2, xor_gate1, 1),
             # Connect XOR gate 1 output to XOR gate 2 input 1
-            {
-                'from_component': xor_gate1,
-                'to_component': xor_gate2,
-                'from_pos': xor_gate1['output_pos'],
-                'to_pos': xor_gate2['input_pos'][0],
-                'value': 0
-            },
+            self._wire(xor_gate1, xor_gate2, 0),
             # Connect input C to XOR gate 2 input 2
-            {
-                'from_component': input3,
-                'to_component': xor_gate2,
-                'from_pos': input3['output_pos'],
-                'to_pos': xor_gate2['input_pos'][1],
-                'value': 0
-            },
+            self._wire(input3, xor_gate2, 1),
             # Connect input A to AND gate input 1
-            {
-                'from_component': input1,
-                'to_component': and_gate,
-                'from_pos': input1['output_pos'],
-                'to_pos': and_gate['input_pos'][0],
-                'value': 0
-            },
+            self._wire(input1, and_gate, 0),
             # Connect XOR gate 2 output to AND gate input 2
-            {
-                'from_component': xor_gate2,
-                'to_component': and_gate,
-                'from_pos': xor_gate2['output_pos'],
-                'to_pos': and_gate['input_pos'][1],
-                'value': 0
-            },
+            self._wire(xor_gate2, and_gate, 1),
             # Connect AND gate output to final output
-            {
-                'from_component': and_gate,
-                'to_component': output,
-                'from_pos': and_gate['output_pos'],
-                'to_pos': output['input_pos'],
-                'value': 0
-            }
+            self._wire(and_gate, output)
         ]
         
-        # Update component inputs based on wires
-        self.update_component_inputs()
+        # Update component inputs and evaluation order based on wires
+        self.build_circuit()
     
     def generate_puzzle(self):
         """Legacy method for backward compatibility"""
         self.generate_puzzle_1()
     
+    def assign_component_ids(self):
+        """Number all inputs, gates and outputs so wires can refer to them by id"""
+        self.comp_by_id = {}
+        for component_id, component in enumerate(self.inputs + self.components + self.outputs):
+            component['id'] = component_id
+            self.comp_by_id[component_id] = component
+    
+    def _wire(self, from_component, to_component, port=None):
+        """Create a wire from a component's output to an input port of another component"""
+        to_pos = to_component['input_pos']
+        if port is not None:
+            to_pos = to_pos[port]
+        wire = {
+            'from_id': from_component['id'],
+            'to_id': to_component['id'],
+            'to_port': port or 0,
+            'from_pos': from_component['output_pos'],
+            'to_pos': to_pos,
+            'value': 0
+        }
+        self._route_wire(wire)
+        return wire
+    
+    def _route_wire(self, wire):
+        """Store the wire's polyline: across to the midpoint, vertically, then into the target"""
+        start_pos = wire['from_pos']
+        end_pos = wire['to_pos']
+        mid_x = (start_pos[0] + end_pos[0]) // 2
+        wire['points'] = [start_pos, (mid_x, start_pos[1]), (mid_x, end_pos[1]), end_pos]
+    
+    def build_circuit(self):
+        """Wire up component inputs and precompute the evaluation order and truth tables once per puzzle"""
+        self.update_component_inputs()
+        
+        # Index wires by the components they leave and enter so nothing rescans the wire list
+        self._wires_from = {component_id: [] for component_id in self.comp_by_id}
+        self._wires_to = {component_id: [] for component_id in self.comp_by_id}
+        for wire in self.wires:
+            self._wires_from[wire['from_id']].append(wire)
+            self._wires_to[wire['to_id']].append(wire)
+        
+        # Topologically sort the gates so each is evaluated after everything feeding it
+        pending = {gate['id']: sum(1 for source_id in gate['inputs'] if self.comp_by_id[source_id]['type'] == 'gate')
+                   for gate in self.components}
+        ready = collections.deque(gate for gate in self.components if pending[gate['id']] == 0)
+        self.eval_order = []
+        while ready:
+            gate = ready.popleft()
+            self.eval_order.append(gate)
+            for wire in self._wires_from[gate['id']]:
+                if wire['to_id'] in pending:
+                    pending[wire['to_id']] -= 1
+                    if pending[wire['to_id']] == 0:
+                        ready.append(self.comp_by_id[wire['to_id']])
+        
+        # Evaluate every input assignment at once: bit r of a component's table is its
+        # output when the inputs spell r in binary (first input is the most significant bit)
+        num_inputs = len(self.inputs)
+        mask = (1 << (1 << num_inputs)) - 1
+        self.truth_tables = [0] * len(self.comp_by_id)
+        for k, input_node in enumerate(self.inputs):
+            # Set where bit (num_inputs - k - 1) of the row index is 1
+            block = 1 << (num_inputs - k - 1)
+            self.truth_tables[input_node['id']] = (mask // ((1 << block) + 1)) << block
+        
+        for gate in self.eval_order:
+            operands = [self.truth_tables[source_id] for source_id in gate['inputs']]
+            self.truth_tables[gate['id']] = GATE_OPS[gate['gate_type']](*operands) & mask
+        
+        for output in self.outputs:
+            self.truth_tables[output['id']] = self.truth_tables[output['inputs'][0]]
+    
     def update_component_inputs(self):
-        """Update the inputs list for each component based on wires"""
+        """Update the inputs list (source ids, in port order) for each component based on wires"""
         # Clear all inputs
         for component in self.components:
-            component['inputs'] = []
+            component['inputs'] = [None] * len(component['input_pos'])
         
         for output in self.outputs:
-            output['inputs'] = []
+            output['inputs'] = [None]
         
         # Add inputs based on wires
         for wire in self.wires:
-            if wire['to_component']['type'] == 'gate':
-                wire['to_component']['inputs'].append(wire['from_component'])
-            elif wire['to_component']['type'] == 'output':
-                wire['to_component']['inputs'].append(wire['from_component'])
+            self.comp_by_id[wire['to_id']]['inputs'][wire['to_port']] = wire['from_id']
     
     def evaluate_circuit(self):
         """Evaluate the entire circuit and update component values"""
-        # First, propagate input values to wires
-        for wire in self.wires:
-            if wire['from_component']['type'] == 'input':
-                wire['value'] = wire['from_component']['value']
+        tables = self.truth_tables
+        
+        # Pack the current input values into a row of the truth tables
+        row = 0
+        for input_node in self.inputs:
+            row = (row << 1) | input_node['value']
         
-        # Evaluate gates in order (this is simplified; a real circuit would need topological sorting)
+        # Every signal is a single bit read from its precomputed table
         for component in self.components:
-            # Get input values from wires
-            input_values = []
-            for wire in self.wires:
-                if wire['to_component'] == component:
-                    input_values.append(wire['value'])
-            
-            # Evaluate gate based on type
-            if component['gate_type'] == 'AND':
-                # AND gate: output is 1 only if all inputs are 1
-                component['result'] = 1 if all(v == 1 for v in input_values) else 0
-            elif component['gate_type'] == 'OR':
-                # OR gate: output is 1 if any input is 1
-                component['result'] = 1 if any(v == 1 for v in input_values) else 0
-            elif component['gate_type'] == 'NOT':
-                # NOT gate: inverts the input
-                if input_values:
-                    component['result'] = 1 if input_values[0] == 0 else 0
-                else:
-                    component['result'] = 0
-            elif component['gate_type'] == 'XOR':
-                # XOR gate: output is 1 if odd number of inputs are 1
-                component['result'] = 1 if sum(input_values) % 2 == 1 else 0
-            
-            # Propagate result to outgoing wires
-            for wire in self.wires:
-                if wire['from_component'] == component:
-                    wire['value'] = component['result']
+            component['result'] = (tables[component['id']] >> row) & 1
+        
+        # Propagate signals to wires for rendering
+        for wire in self.wires:
+            wire['value'] = (tables[wire['from_id']] >> row) & 1
         
         # Finally, update output values
         for output in self.outputs:
-            # Get input value from wire
-            for wire in self.wires:
-                if wire['to_component'] == output:
-                    output['value'] = wire['value']
+            output['value'] = (tables[output['id']] >> row) & 1
             
             # Check if output matches target
             if output['value'] == output['target']:
@@ -990,8 +977,9 @@ class LogicGatePuzzle(Puzzle):
                     if input_node['rect'].collidepoint(mouse_pos):
                         # Toggle input value
                         input_node['value'] = 1 if input_node['value'] == 0 else 0
-                        # Re-evaluate circuit
-                        self.evaluate_circuit()
+                        # Re-evaluate circuit (dragging only moves geometry, so it never sets this)
+                        self._dirty_logic = True
+                        self._layout_changed = True
                         break
                 
                 # Check if clicked on a gate to drag it
@@ -1009,8 +997,6 @@ class LogicGatePuzzle(Puzzle):
             if event.button == 1:  # Left click release
                 self.dragging = False
                 self.selected_component = None
-                # Re-evaluate circuit after moving components
-                self.evaluate_circuit()
         
         elif event.type == pygame.MOUSEMOTION:
             if self.dragging and self.selected_component:
@@ -1018,6 +1004,7 @@ class LogicGatePuzzle(Puzzle):
                 mouse_pos = pygame.mouse.get_pos()
                 self.selected_component['rect'].x = mouse_pos[0] + self.drag_offset[0]
                 self.selected_component['rect'].y = mouse_pos[1] + self.drag_offset[1]
+                self._layout_changed = True
                 
                 # Update connection points
                 if self.selected_component['type'] == 'gate':
@@ -1035,54 +1022,58 @@ class LogicGatePuzzle(Puzzle):
                         self.selected_component['input_pos'] = [(rect.x, rect.y + rect.height // 2)]
                         self.selected_component['output_pos'] = (rect.x + rect.width, rect.y + rect.height // 2)
                 
-                # Update wire positions
-                for wire in self.wires:
-                    if wire['from_component'] == self.selected_component:
-                        wire['from_pos'] = self.selected_component['output_pos']
-                    if wire['to_component'] == self.selected_component:
-                        # Find which input this wire connects to
-                        if self.selected_component['type'] == 'gate':
-                            for i, input_pos in enumerate(self.selected_component['input_pos']):
-                                # This is a simplification; in a real game you'd track which input is connected
-                                if i < len(self.selected_component['input_pos']):
-                                    wire['to_pos'] = self.selected_component['input_pos'][i]
-                                    break
-                        else:
-                            wire['to_pos'] = self.selected_component['input_pos']
+                # Update only the wires attached to the dragged component
+                selected_id = self.selected_component['id']
+                for wire in self._wires_from[selected_id]:
+                    wire['from_pos'] = self.selected_component['output_pos']
+                    self._route_wire(wire)
+                for wire in self._wires_to[selected_id]:
+                    # Attach to the input port this wire connects to
+                    if self.selected_component['type'] == 'gate':
+                        wire['to_pos'] = self.selected_component['input_pos'][wire['to_port']]
+                    else:
+                        wire['to_pos'] = self.selected_component['input_pos']
+                    self._route_wire(wire)
     
     def update(self):
+        # Evaluate at most once per frame, however many inputs were toggled
+        if self._dirty_logic:
+            self.evaluate_circuit()
+            self._dirty_logic = False
+        
         # Check if level is completed
         if self.level_complete:
             self.completed = True
             
         # No time limit check - let player continue indefinitely
     
+    def take_dirty_rects(self):
+        """Return the screen areas changed since the last call, or None if the whole screen may have"""
+        # Wires can cross the whole screen, so any toggle or drag redraws everything;
+        # otherwise only the timer and status messages change
+        if self._layout_changed:
+            self._layout_changed = False
+            return None
+        return list(self.status_rects)
+    
     def render(self, surface):
         # Draw background
-        pygame.draw.rect(surface, (10, 10, 20), (0, 0, self.screen_width, self.screen_height))
+        surface.fill((10, 10, 20))
         
         # Draw title
-        title_text = self.font.render("Logic Gate Puzzle", True, (0, 255, 0))
+        title_text = self.render_text('title', "Logic Gate Puzzle", (0, 255, 0))
         surface.blit(title_text, (self.screen_width // 2 - title_text.get_width() // 2, 20))
         
         # Draw instructions
-        instr_text = self.font_small.render("Click inputs to toggle values. Drag gates to rearrange. Make output = 1", True, (0, 200, 0))
+        instr_text = self.render_text('instructions', "Click inputs to toggle values. Drag gates to rearrange. Make output = 1", (0, 200, 0), font=self.font_small)
         surface.blit(instr_text, (self.screen_width // 2 - instr_text.get_width() // 2, 60))
         
-        # Draw wires first (so they appear behind components)
-        for wire in self.wires:
-            # Wire color based on signal value
-            color = (0, 255, 0) if wire['value'] == 1 else (100, 100, 100)
-            
-            # Draw wire as a line with a slight curve
-            start_pos = wire['from_pos']
-            end_pos = wire['to_pos']
-            mid_x = (start_pos[0] + end_pos[0]) // 2
-            
-            # Draw as three connected lines for a simple curve effect
-            pygame.draw.line(surface, color, start_pos, (mid_x, start_pos[1]), 2)
-            pygame.draw.line(surface, color, (mid_x, start_pos[1]), (mid_x, end_pos[1]), 2)
-            pygame.draw.line(surface, color, (mid_x, end_pos[1]), end_pos, 2)
+        # Draw wires first (so they appear behind components), one polyline each;
+        # inactive wires go first so active ones are drawn on top where they cross
+        for value, color in ((0, (100, 100, 100)), (1, (0, 255, 0))):
+            for wire in self.wires:
+                if wire['value'] == value:
+                    pygame.draw.lines(surface, color, False, wire['points'], 2)
         
         # Draw input nodes
         for input_node in self.inputs:
@@ -1093,11 +1084,11 @@ class LogicGatePuzzle(Puzzle):
             pygame.draw.rect(surface, color, input_node['rect'], 2)
             
             # Draw label
-            label_text = self.font.render(input_node['label'], True, color)
+            label_text = self.render_text(('input_label', input_node['id']), input_node['label'], color)
             surface.blit(label_text, (input_node['rect'].x + 5, input_node['rect'].y - 25))
             
             # Draw value
-            value_text = self.font.render(str(input_node['value']), True, color)
+            value_text = self.render_text(('input_value', input_node['id']), str(input_node['value']), color)
             surface.blit(value_text, (input_node['rect'].x + 15, input_node['rect'].y + 10))
         
         # Draw logic gates
@@ -1106,7 +1097,7 @@ class LogicGatePuzzle(Puzzle):
             pygame.draw.rect(surface, (0, 150, 150), component['rect'], 2)
             
             # Draw gate type
-            gate_text = self.font.render(component['gate_type'], True, (0, 200, 200))
+            gate_text = self.render_text(('gate', component['id']), component['gate_type'], (0, 200, 200))
             surface.blit(gate_text, (component['rect'].x + 5, component['rect'].y + 20))
         
         # Draw output node
@@ -1118,37 +1109,45 @@ class LogicGatePuzzle(Puzzle):
             pygame.draw.rect(surface, color, output['rect'], 2)
             
             # Draw label
-            label_text = self.font.render(output['label'], True, color)
+            label_text = self.render_text(('output_label', output['id']), output['label'], color)
             surface.blit(label_text, (output['rect'].x - 10, output['rect'].y - 25))
             
             # Draw current value and target
-            value_text = self.font.render(f"{output['value']} / Target: {output['target']}", True, color)
+            value_text = self.render_text(('output_value', output['id']), f"{output['value']} / Target: {output['target']}", color)
             surface.blit(value_text, (output['rect'].x - 20, output['rect'].y + 50))
         
         # Draw timer
         elapsed_time = (pygame.time.get_ticks() - self.start_time) / 1000
         time_left = max(0, self.time_limit - elapsed_time)
-        timer_text = self.font.render(f"Time: {int(time_left)}s", True, (0, 255, 0))
+        timer_text = self.render_text('timer', f"Time: {int(time_left)}s", (0, 255, 0))
         surface.blit(timer_text, (20, 20))
         
         # Draw completion message
         if self.level_complete:
-            complete_text = self.font.render("Circuit Complete! Well done!", True, (0, 255, 0))
+            complete_text = self.render_text('complete', "Circuit Complete! Well done!", (0, 255, 0))
             surface.blit(complete_text, (self.screen_width // 2 - complete_text.get_width() // 2, 500))
         
         # Draw failure message
         if self.level_failed:
-            fail_text = self.font.render("Time's up! Try again.", True, (255, 0, 0))
+            fail_text = self.render_text('failed', "Time's up! Try again.", (255, 0, 0))
             surface.blit(fail_text, (self.screen_width // 2 - fail_text.get_width() // 2, 500))
 
 
 class MemoryDecryption(Puzzle):
     """Level 3: Memory Decryption"""
+    # render() fills the whole screen
+    OPAQUE_BACKGROUND = True
+    
+    # Tile symbols (using hex codes for simplicity); tiles store indices into this list
+    SYMBOL_NAMES = ('0x01', '0x02', '0x03', '0x04', '0x05', '0x06', '0x07', '0x08')
+    
+    # Shared generator for shuffling the tiles
+    _rng = np.random.default_rng()
+    
     def __init__(self, screen_width, screen_height):
         super().__init__(screen_width, screen_height)
         self.grid_size = 4  # 4x4 grid of memory tiles
         self.tile_size = 80
-        self.grid = []
         self.selected_tiles = []
         self.matched_pairs = []
         self.show_all = False
@@ -1163,161 +1162,166 @@ class MemoryDecryption(Puzzle):
     
     def generate_grid(self):
         """Generate a grid of memory tiles with matching pairs"""
-        # Create pairs of symbols (using hex codes for simplicity)
-        symbols = ['0x01', '0x02', '0x03', '0x04', '0x05', '0x06', '0x07', '0x08']
-        pairs = symbols + symbols  # Each symbol appears twice
+        # Tile state is kept in parallel (row, col) arrays
+        shape = (self.grid_size, self.grid_size)
         
-        # Shuffle the pairs
-        random.shuffle(pairs)
+        # Halving a shuffled 0..n-1 gives every symbol index exactly twice, in random order
+        num_tiles = self.grid_size * self.grid_size
+        self._sym = (self._rng.permutation(num_tiles) // 2).astype(np.int8).reshape(shape)
+        self._rev = np.zeros(shape, dtype=bool)
+        self._mat = np.zeros(shape, dtype=bool)
         
-        # Create the grid
-        self.grid = []
-        for i in range(self.grid_size):
-            row = []
-            for j in range(self.grid_size):
-                index = i * self.grid_size + j
-                if index < len(pairs):
-                    tile = {
-                        'symbol': pairs[index],
-                        'revealed': False,
-                        'matched': False,
-                        'rect': pygame.Rect(
-                            self.screen_width // 2 - (self.grid_size * self.tile_size) // 2 + j * self.tile_size,
-                            self.screen_height // 2 - (self.grid_size * self.tile_size) // 2 + i * self.tile_size,
-                            self.tile_size - 10,
-                            self.tile_size - 10
-                        )
-                    }
-                    row.append(tile)
-            self.grid.append(row)
+        # Tile origins, so a click is hit-tested against every tile at once
+        left = self.screen_width // 2 - (self.grid_size * self.tile_size) // 2
+        top = self.screen_height // 2 - (self.grid_size * self.tile_size) // 2
+        steps = np.arange(self.grid_size, dtype=np.int16) * self.tile_size
+        self._x, self._y = np.meshgrid(left + steps, top + steps)
+        self.tile_extent = self.tile_size - 10
+        
+        # Row-major rects for drawing
+        self._tile_rects = [pygame.Rect(x, y, self.tile_extent, self.tile_extent)
+                            for x, y in zip(self._x.ravel().tolist(), self._y.ravel().tolist())]
+        
+        # How each tile looked when take_dirty_rects was last called (None before the first frame)
+        self._last_shown = None
         
         # Show all tiles at the beginning
         self.show_all = True
         self.show_all_time = pygame.time.get_ticks()
     
+    def hide_mismatched(self):
+        """Hide the selected tiles that were not matched and clear the selection"""
+        for tile in self.selected_tiles:
+            if not self._mat[tile]:
+                self._rev[tile] = False
+        self.selected_tiles = []
+    
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             # Only allow clicking if not showing all tiles and not revealing a mismatch
             if not self.show_all and (len(self.selected_tiles) < 2 or pygame.time.get_ticks() - self.reveal_time > self.reveal_duration):
-                mouse_pos = pygame.mouse.get_pos()
+                mouse_x, mouse_y = pygame.mouse.get_pos()
                 
                 # Reset selected tiles if we've shown a mismatch long enough
                 if len(self.selected_tiles) == 2 and pygame.time.get_ticks() - self.reveal_time > self.reveal_duration:
-                    for tile in self.selected_tiles:
-                        if not tile['matched']:
-                            tile['revealed'] = False
-                    self.selected_tiles = []
+                    self.hide_mismatched()
+                
+                # Check if a hidden tile was clicked
+                hits = ((mouse_x >= self._x) & (mouse_x < self._x + self.tile_extent) &
+                        (mouse_y >= self._y) & (mouse_y < self._y + self.tile_extent) &
+                        ~self._mat & ~self._rev)
+                if not hits.any():
+                    return
+                tile = np.unravel_index(np.argmax(hits), hits.shape)
                 
-                # Check if a tile was clicked
-                for row in self.grid:
-                    for tile in row:
-                        if tile['rect'].collidepoint(mouse_pos) and not tile['matched'] and not tile['revealed']:
-                            # Reveal the tile
-                            tile['revealed'] = True
-                            self.selected_tiles.append(tile)
-                            
-                            # Check if two tiles are selected
-                            if len(self.selected_tiles) == 2:
-                                # Check if they match
-                                if self.selected_tiles[0]['symbol'] == self.selected_tiles[1]['symbol']:
-                                    # Match found
-                                    self.selected_tiles[0]['matched'] = True
-                                    self.selected_tiles[1]['matched'] = True
-                                    self.matched_pairs.append(self.selected_tiles.copy())
-                                    self.selected_tiles = []
-                                    
-                                    # Check if all pairs are matched
-                                    all_matched = True
-                                    for r in self.grid:
-                                        for t in r:
-                                            if not t['matched']:
-                                                all_matched = False
-                                                break
-                                    
-                                    if all_matched:
-                                        self.completed = True
-                                else:
-                                    # No match, start reveal timer
-                                    self.reveal_time = pygame.time.get_ticks()
-                            
-                            # Only process one tile per click
-                            return
+                # Reveal the tile
+                self._rev[tile] = True
+                self.selected_tiles.append(tile)
+                
+                # Check if two tiles are selected
+                if len(self.selected_tiles) == 2:
+                    # Check if they match
+                    first, second = self.selected_tiles
+                    if self._sym[first] == self._sym[second]:
+                        # Match found
+                        self._mat[first] = True
+                        self._mat[second] = True
+                        self.matched_pairs.append(self.selected_tiles.copy())
+                        self.selected_tiles = []
+                        
+                        # Check if all pairs are matched (matched_pairs already counts them)
+                        if len(self.matched_pairs) == self._sym.size // 2:
+                            self.completed = True
+                    else:
+                        # No match, start reveal timer
+                        self.reveal_time = pygame.time.get_ticks()
     
     def update(self):
         # Check if initial reveal time is over
         if self.show_all and pygame.time.get_ticks() - self.show_all_time > self.show_duration:
             self.show_all = False
             # Hide all tiles
-            for row in self.grid:
-                for tile in row:
-                    tile['revealed'] = False
+            self._rev[:] = False
         
         # Check if mismatched tiles should be hidden
         if len(self.selected_tiles) == 2 and pygame.time.get_ticks() - self.reveal_time > self.reveal_duration:
-            # Hide mismatched tiles
-            for tile in self.selected_tiles:
-                if not tile['matched']:
-                    tile['revealed'] = False
-            self.selected_tiles = []
+            self.hide_mismatched()
             
         # No time limit check - let player continue indefinitely
     
+    def take_dirty_rects(self):
+        """Return the screen areas changed since the last call, or None if the whole screen may have"""
+        # What each tile shows: 0 hidden, 1 revealed, 2 matched
+        shown = np.where(self._mat, 2, self._rev | self.show_all).ravel()
+        last_shown = self._last_shown
+        self._last_shown = shown
+        if last_shown is None:
+            return None
+        
+        rects = [self._tile_rects[i] for i in np.flatnonzero(shown != last_shown).tolist()]
+        rects.extend(self.status_rects)
+        return rects
+    
     def render(self, surface):
         # Draw background
-        pygame.draw.rect(surface, (10, 10, 20), (0, 0, self.screen_width, self.screen_height))
+        surface.fill((10, 10, 20))
         
         # Draw title
-        title_text = self.font.render("Memory Decryption", True, (0, 255, 0))
+        title_text = self.render_text('title', "Memory Decryption", (0, 255, 0))
         surface.blit(title_text, (self.screen_width // 2 - title_text.get_width() // 2, 20))
         
         # Draw grid
-        for row in self.grid:
-            for tile in row:
-                # Determine tile color
-                if tile['matched']:
-                    color = (0, 200, 0)  # Green for matched
-                elif tile['revealed'] or self.show_all:
-                    color = (0, 150, 150)  # Cyan for revealed
-                else:
-                    color = (50, 50, 50)  # Dark gray for hidden
-                
-                # Draw tile background
-                pygame.draw.rect(surface, color, tile['rect'])
-                
-                # Draw tile border
-                pygame.draw.rect(surface, (0, 255, 0), tile['rect'], 2)
-                
-                # Draw symbol if revealed or showing all
-                if tile['revealed'] or self.show_all or tile['matched']:
-                    symbol_text = self.font.render(tile['symbol'], True, (0, 0, 0))
-                    surface.blit(
-                        symbol_text,
-                        (tile['rect'].x + tile['rect'].width // 2 - symbol_text.get_width() // 2,
-                         tile['rect'].y + tile['rect'].height // 2 - symbol_text.get_height() // 2)
-                    )
+        tiles = zip(self._tile_rects, self._sym.ravel().tolist(),
+                    self._rev.ravel().tolist(), self._mat.ravel().tolist())
+        for rect, symbol, revealed, matched in tiles:
+            # Determine tile color
+            if matched:
+                color = (0, 200, 0)  # Green for matched
+            elif revealed or self.show_all:
+                color = (0, 150, 150)  # Cyan for revealed
+            else:
+                color = (50, 50, 50)  # Dark gray for hidden
+            
+            # Draw tile background
+            pygame.draw.rect(surface, color, rect)
+            
+            # Draw tile border
+            pygame.draw.rect(surface, (0, 255, 0), rect, 2)
+            
+            # Draw symbol if revealed or showing all
+            if revealed or self.show_all or matched:
+                symbol_text = self.render_text(('symbol', symbol), self.SYMBOL_NAMES[symbol], (0, 0, 0))
+                surface.blit(
+                    symbol_text,
+                    (rect.x + rect.width // 2 - symbol_text.get_width() // 2,
+                     rect.y + rect.height // 2 - symbol_text.get_height() // 2)
+                )
         
         # Draw timer
         elapsed_time = (pygame.time.get_ticks() - self.start_time) / 1000
         time_left = max(0, self.time_limit - elapsed_time)
-        timer_text = self.font.render(f"Time: {int(time_left)}s", True, (0, 255, 0))
+        timer_text = self.render_text('timer', f"Time: {int(time_left)}s", (0, 255, 0))
         surface.blit(timer_text, (20, 20))
         
         # Draw instructions
         if self.show_all and pygame.time.get_ticks() - self.show_all_time < self.show_duration:
-            instr_text = self.font.render("Memorize the patterns!", True, (0, 255, 0))
+            instr_text = self.render_text('instructions', "Memorize the patterns!", (0, 255, 0))
             surface.blit(instr_text, (self.screen_width // 2 - instr_text.get_width() // 2, self.screen_height - 50))
         else:
-            instr_text = self.font.render("Click tiles to reveal and match pairs", True, (0, 255, 0))
+            instr_text = self.render_text('instructions', "Click tiles to reveal and match pairs", (0, 255, 0))
             surface.blit(instr_text, (self.screen_width // 2 - instr_text.get_width() // 2, self.screen_height - 50))
         
         # Draw completion message
         if self.completed:
-            complete_text = self.font.render("Memory Decrypted! Access Granted!", True, (0, 255, 0))
+            complete_text = self.render_text('complete', "Memory Decrypted! Access Granted!", (0, 255, 0))
             surface.blit(complete_text, (self.screen_width // 2 - complete_text.get_width() // 2, self.screen_height - 80))
 
 
 class CoreBreachTiming(Puzzle):
     """Level 4: Core Breach Timing"""
+    # render() fills the whole screen
+    OPAQUE_BACKGROUND = True
+    
     def __init__(self, screen_width, screen_height):
         super().__init__(screen_width, screen_height)
         self.completed = False
@@ -1337,21 +1341,27 @@ class CoreBreachTiming(Puzzle):
         self.current_angle = 0
         self.success_flashes = 0
         self.flash_time = 0
+        
+        # Node areas and core flash state as of the last take_dirty_rects call (None before the first frame)
+        self._node_rects = None
+        self._core_lit = 0
+        self._core_rect = pygame.Rect(0, 0, self.core_radius * 2, self.core_radius * 2)
+        self._core_rect.center = self.center_pos
         self.generate_nodes()
         self.generate_sequence()
     
     def generate_nodes(self):
         """Generate nodes that orbit the core"""
         num_nodes = 8
+        
+        # Node angles and screen positions live in arrays so update() moves them all at once
+        self._base_angles = np.arange(num_nodes) * (360.0 / num_nodes)
+        self._pos = np.empty((num_nodes, 2), dtype=np.int32)
+        self.update_node_positions()
+        
         for i in range(num_nodes):
-            angle = i * (360 / num_nodes)
-            x = self.center_pos[0] + self.orbit_radius * math.cos(math.radians(angle))
-            y = self.center_pos[1] + self.orbit_radius * math.sin(math.radians(angle))
-            
             node = {
                 'id': i,
-                'pos': (int(x), int(y)),
-                'angle': angle,
                 'radius': 30,
                 'active': False,
                 'hit': False,
@@ -1359,15 +1369,18 @@ class CoreBreachTiming(Puzzle):
             }
             self.nodes.append(node)
     
+    def update_node_positions(self):
+        """Recompute every node's position on the orbit for the current rotation"""
+        radians = np.deg2rad(self._base_angles + self.current_angle)
+        # Assigning into the int32 array truncates like int() did
+        self._pos[:, 0] = self.center_pos[0] + self.orbit_radius * np.cos(radians)
+        self._pos[:, 1] = self.center_pos[1] + self.orbit_radius * np.sin(radians)
+    
     def generate_sequence(self):
         """Generate a sequence of nodes to activate"""
-        import random
-        
         # Create a sequence of node IDs
         sequence_length = 5  # Start with 5 nodes
-        self.sequence = []
-        for _ in range(sequence_length):
-            self.sequence.append(random.randint(0, len(self.nodes) - 1))
+        self.sequence = random.choices(range(len(self.nodes)), k=sequence_length)
         
         # Activate the first node
         self.activate_next_node()
@@ -1388,11 +1401,13 @@ class CoreBreachTiming(Puzzle):
             # Check if clicked on the active node
             mouse_pos = pygame.mouse.get_pos()
             if self.active_node:
-                dx = mouse_pos[0] - self.active_node['pos'][0]
-                dy = mouse_pos[1] - self.active_node['pos'][1]
-                distance = (dx*dx + dy*dy) ** 0.5
+                node_x, node_y = self._pos[self.active_node['id']].tolist()
+                dx = mouse_pos[0] - node_x
+                dy = mouse_pos[1] - node_y
+                radius = self.active_node['radius']
                 
-                if distance <= self.active_node['radius']:
+                # Compare squared distances so no square root is needed
+                if dx*dx + dy*dy <= radius * radius:
                     # Hit the active node
                     self.active_node['hit'] = True
                     self.active_node['active'] = False
@@ -1424,11 +1439,7 @@ class CoreBreachTiming(Puzzle):
         if self.current_angle >= 360:
             self.current_angle -= 360
         
-        for node in self.nodes:
-            angle = node['angle'] + self.current_angle
-            x = self.center_pos[0] + self.orbit_radius * math.cos(math.radians(angle))
-            y = self.center_pos[1] + self.orbit_radius * math.sin(math.radians(angle))
-            node['pos'] = (int(x), int(y))
+        self.update_node_positions()
         
         # Check if active node timed out
         if self.active_node and pygame.time.get_ticks() - self.active_time > self.active_duration:
@@ -1446,12 +1457,36 @@ class CoreBreachTiming(Puzzle):
             
         # No time limit check - let player continue indefinitely
     
+    def take_dirty_rects(self):
+        """Return the screen areas changed since the last call, or None if the whole screen may have"""
+        # Each node's area, padded to cover its active ring
+        node_rects = []
+        for node, (x, y) in zip(self.nodes, self._pos.tolist()):
+            reach = node['radius'] + 6
+            node_rects.append(pygame.Rect(x - reach, y - reach, reach * 2, reach * 2))
+        last_rects = self._node_rects
+        self._node_rects = node_rects
+        
+        core_lit = self.success_flashes % 2
+        core_changed = core_lit != self._core_lit
+        self._core_lit = core_lit
+        
+        if last_rects is None:
+            return None
+        
+        # A node has to be redrawn where it was as well as where it is now
+        rects = [new.union(old) for new, old in zip(node_rects, last_rects)]
+        if core_changed:
+            rects.append(self._core_rect)
+        rects.extend(self.status_rects)
+        return rects
+    
     def render(self, surface):
         # Draw background
-        pygame.draw.rect(surface, (10, 10, 20), (0, 0, self.screen_width, self.screen_height))
+        surface.fill((10, 10, 20))
         
         # Draw title
-        title_text = self.font.render("Core Breach Timing", True, (0, 255, 0))
+        title_text = self.render_text('title', "Core Breach Timing", (0, 255, 0))
         surface.blit(title_text, (self.screen_width // 2 - title_text.get_width() // 2, 20))
         
         # Draw core
@@ -1463,26 +1498,26 @@ class CoreBreachTiming(Puzzle):
         pygame.draw.circle(surface, (30, 30, 30), self.center_pos, self.orbit_radius, 1)
         
         # Draw nodes
-        for node in self.nodes:
+        for node, pos in zip(self.nodes, self._pos.tolist()):
             # Draw node
-            pygame.draw.circle(surface, node['color'], node['pos'], node['radius'])
+            pygame.draw.circle(surface, node['color'], pos, node['radius'])
             
             # Draw node ID
-            id_text = self.font.render(str(node['id']), True, (0, 0, 0))
+            id_text = self.render_text(('node', node['id']), str(node['id']), (0, 0, 0))
             surface.blit(
                 id_text,
-                (node['pos'][0] - id_text.get_width() // 2,
-                 node['pos'][1] - id_text.get_height() // 2)
+                (pos[0] - id_text.get_width() // 2,
+                 pos[1] - id_text.get_height() // 2)
             )
             
             # Draw active indicator
             if node['active']:
-                pygame.draw.circle(surface, (255, 255, 0), node['pos'], node['radius'] + 5, 3)
+                pygame.draw.circle(surface, (255, 255, 0), pos, node['radius'] + 5, 3)
         
         # Draw sequence progress
-        progress_text = self.font.render(
+        progress_text = self.render_text(
+            'progress',
             f"Sequence: {self.current_sequence_index}/{len(self.sequence)}", 
-            True, 
             (0, 255, 0)
         )
         surface.blit(progress_text, (20, 60))
@@ -1490,16 +1525,16 @@ class CoreBreachTiming(Puzzle):
         # Draw timer
         elapsed_time = (pygame.time.get_ticks() - self.start_time) / 1000
         time_left = max(0, self.time_limit - elapsed_time)
-        timer_text = self.font.render(f"Time: {int(time_left)}s", True, (0, 255, 0))
+        timer_text = self.render_text('timer', f"Time: {int(time_left)}s", (0, 255, 0))
         surface.blit(timer_text, (20, 20))
         
         # Draw instructions
-        instr_text = self.font.render("Click the highlighted nodes in sequence before they time out", True, (0, 255, 0))
+        instr_text = self.render_text('instructions', "Click the highlighted nodes in sequence before they time out", (0, 255, 0))
         surface.blit(instr_text, (self.screen_width // 2 - instr_text.get_width() // 2, self.screen_height - 50))
         
         # Draw completion message
         if self.sequence_complete:
-            complete_text = self.font.render("Core Breached! System Access Granted!", True, (0, 255, 0))
+            complete_text = self.render_text('complete', "Core Breached! System Access Granted!", (0, 255, 0))
             surface.blit(complete_text, (self.screen_width // 2 - complete_text.get_width() // 2, self.screen_height - 80))
 
 
@@ -1515,20 +1550,27 @@ class LevelManager:
             MemoryDecryption(screen_width, screen_height),
             CoreBreachTiming(screen_width, screen_height)
         ]
+        # The level list is fixed, so its length is looked up once
+        self.num_levels = len(self.levels)
         self.transition_time = 0
         self.in_transition = False
         self.font = pygame.font.SysFont('consolas', 30)
     
     def handle_event(self, event):
-        if not self.in_transition and self.current_level < len(self.levels):
+        if not self.in_transition and self.current_level < self.num_levels:
             self.levels[self.current_level].handle_event(event)
     
+    def handle_events(self, events):
+        """Pass a frame's events to the current level as one batch"""
+        if not self.in_transition and self.current_level < self.num_levels:
+            self.levels[self.current_level].handle_events(events)
+    
     def update(self):
         if self.in_transition:
             # Handle transition animation
             if pygame.time.get_ticks() - self.transition_time > 2000:  # 2 second transition
                 self.in_transition = False
-        elif self.current_level < len(self.levels):
+        elif self.current_level < self.num_levels:
             # Update current level
             self.levels[self.current_level].update()
             
@@ -1536,6 +1578,15 @@ class LevelManager:
             if self.levels[self.current_level].is_completed():
                 self.start_transition()
     
+    def covers_screen(self):
+        """Check if the current level repaints the whole screen this frame"""
+        return (not self.in_transition and self.current_level < self.num_levels and
+                self.levels[self.current_level].OPAQUE_BACKGROUND)
+    
+    def take_dirty_rects(self):
+        """Return the screen areas the current level changed since the last call, or None for the whole screen"""
+        return self.levels[self.current_level].take_dirty_rects()
+    
     def start_transition(self):
         self.in_transition = True
         self.transition_time = pygame.time.get_ticks()
@@ -1545,14 +1596,14 @@ class LevelManager:
         if self.in_transition:
             # Render transition screen
             level_text = "Level Complete!"
-            if self.current_level < len(self.levels):
+            if self.current_level < self.num_levels:
                 level_text += f" Preparing Level {self.current_level + 1}..."
             else:
                 level_text = "All Levels Complete! You've mastered CypherCore!"
             
             text = self.font.render(level_text, True, (0, 255, 0))
             surface.blit(text, (self.screen_width // 2 - text.get_width() // 2, self.screen_height // 2))
-        elif self.current_level < len(self.levels):
+        elif self.current_level < self.num_levels:
             # Render current level
             self.levels[self.current_level].render(surface)
         else:
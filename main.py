@@ -3,13 +3,14 @@ import sys
 import os
 import time
 import random
+import collections
 from matrix_effect import MatrixEffect
 from audio_engine import AudioEngine
 from level_manager import LevelManager
 
-# Initialize pygame
-pygame.init()
-pygame.mixer.init()
+# Initialize only what startup needs; AudioEngine opens the mixer on first use
+pygame.display.init()
+pygame.font.init()
 
 # Constants
 SCREEN_WIDTH = 800
@@ -35,9 +36,18 @@ GAME_OVER = 3
 class Game:
     def __init__(self):
         self.state = INTRO
+        
+        # Clock sample shared by everything that runs in the current frame
+        self.frame_tick = pygame.time.get_ticks()
+        
         self.font = pygame.font.SysFont('consolas', 20)
         self.title_font = pygame.font.SysFont('consolas', 40)
         
+        # The intro prompt blinks between two pre-rendered colors
+        # (long-lived text surfaces are converted to the display format so blits skip conversion)
+        self.press_enter_surfs = [self.font.render("Press ENTER to continue...", True, color).convert_alpha()
+                                  for color in (GREEN, BLACK)]
+        
         # Initialize components
         self.matrix_effect = MatrixEffect(SCREEN_WIDTH, SCREEN_HEIGHT)
         self.matrix_effect.set_color_scheme("cyan_purple")  # Set the new color scheme
@@ -49,8 +59,22 @@ class Game:
         
         # Menu options
         self.menu_options = ["Start Game", "Quit"]
+        self.num_menu_options = len(self.menu_options)
         self.selected_option = 0
         
+        # Frame tick of the last menu navigation click
+        self.last_click_time = -50
+        
+        # The menu never changes, so render its text once (each option unselected and selected)
+        self.menu_title_surf = self.title_font.render("CypherCore", True, BRIGHT_GREEN).convert_alpha()
+        self.menu_subtitle_surf = self.font.render("A Cyberpunk Puzzle Adventure", True, GREEN).convert_alpha()
+        self.menu_footer_surf = self.font.render("Use arrow keys to navigate, ENTER to select", True, GREEN).convert_alpha()
+        self.menu_option_surfs = [
+            (self.font.render(option, True, GREEN).convert_alpha(),
+             self.font.render(f"> {option} <", True, BRIGHT_GREEN).convert_alpha())
+            for option in self.menu_options
+        ]
+        
         # Transition effects
         self.transition_active = False
         self.transition_start_time = 0
@@ -59,10 +83,28 @@ class Game:
         self.transition_to_state = None
         self.transition_alpha = 0
         
-        # Performance tracking
-        self.frame_times = []
+        # Opaque black overlay faded with set_alpha, so it isn't rebuilt every frame
+        self.transition_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        self.transition_overlay.fill(BLACK)
+        
+        # Performance tracking (last 60 frame times and their running sum)
+        self.frame_times = collections.deque(maxlen=60)
+        self.frame_time_sum = 0.0
         self.show_fps = False
         
+        # Strip in the top-right corner that the FPS counter is drawn in
+        self.fps_rect = pygame.Rect(SCREEN_WIDTH // 2, 0, SCREEN_WIDTH // 2, 10 + self.font.get_height())
+        
+        # (state, transition_active, covered, level) of the last presented frame; a change forces a full flip
+        self.last_frame_key = None
+        
+        # Per-state event handlers, looked up once per event
+        # (levels get the whole batch from handle_events instead)
+        self.event_handlers = {
+            INTRO: self.handle_intro_event,
+            MAIN_MENU: self.handle_menu_event
+        }
+        
     def setup_intro(self):
         self.intro_text = [
             "   ______      ______  _                 ______                 ",
@@ -72,28 +114,48 @@ class Game:
             "\\____/\\__, /_/    |_| |_|\\___/|_| |_\\______|\\___/ |_|  \\___|  ",
             "     /____/                                                     "
         ]
+        self.num_intro_lines = len(self.intro_text)
         self.intro_progress = 0
         self.intro_char_index = 0
         self.intro_line_index = 0
         self.intro_complete = False
-        self.intro_start_time = time.time()
-        self.intro_display_text = ["" for _ in range(len(self.intro_text))]
+        self.intro_start_time = self.frame_tick
+        self.intro_display_text = ["" for _ in range(self.num_intro_lines)]
+        
+        # Rendered (text, surface) per intro line, refreshed only when the typed prefix grows
+        self.intro_line_surfs = [None] * self.num_intro_lines
+        
+        # Band covering the intro text and prompt; nothing else changes on the intro screen
+        y_offset = SCREEN_HEIGHT // 2 - (self.num_intro_lines * 20) // 2
+        self.intro_rect = pygame.Rect(0, y_offset, SCREEN_WIDTH,
+                                      self.num_intro_lines * 20 + 40 + self.font.get_height())
         
     def run(self):
+        # Keep event types the game never handles out of the queue at the SDL level
+        pygame.event.set_blocked([
+            pygame.KEYUP, pygame.TEXTINPUT, pygame.MOUSEWHEEL, pygame.FINGERMOTION,
+            pygame.JOYAXISMOTION, pygame.JOYBALLMOTION, pygame.JOYHATMOTION
+        ])
+        
         # Main game loop
         running = True
         while running:
-            # Start frame timing
-            frame_start_time = time.time()
+            # Start frame timing (perf_counter is monotonic, unlike time.time)
+            frame_start_time = time.perf_counter()
+            self.frame_tick = pygame.time.get_ticks()
             
-            # Handle events
-            for event in pygame.event.get():
+            # Handle events (fetched as one batch per frame)
+            events = pygame.event.get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
                     # Toggle FPS display
                     self.show_fps = not self.show_fps
-                self.handle_event(event)
+                elif event.type in (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.VIDEOEXPOSE):
+                    # The window's contents may have been lost, so the next frame is pushed in full
+                    self.last_frame_key = None
+            self.handle_events(events)
             
             # Update game state
             self.update()
@@ -105,37 +167,55 @@ class Game:
             clock.tick(FPS)
             
             # Track frame time for performance monitoring
-            frame_time = time.time() - frame_start_time
+            frame_time = time.perf_counter() - frame_start_time
+            if len(self.frame_times) == self.frame_times.maxlen:
+                # The deque is about to drop its oldest entry
+                self.frame_time_sum -= self.frame_times[0]
             self.frame_times.append(frame_time)
-            if len(self.frame_times) > 60:  # Keep only last 60 frames
-                self.frame_times.pop(0)
+            self.frame_time_sum += frame_time
         
         pygame.quit()
         sys.exit()
     
+    def handle_events(self, events):
+        """Dispatch a frame's events; levels receive them as one batch"""
+        if self.state == PLAYING and not self.transition_active:
+            self.level_manager.handle_events(events)
+            return
+        
+        for event in events:
+            self.handle_event(event)
+    
     def handle_event(self, event):
         # Don't process events during transitions
         if self.transition_active:
             return
-            
-        if self.state == INTRO:
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
-                self.start_transition(INTRO, MAIN_MENU)
-                self.audio_engine.play_sound('click')
-        
-        elif self.state == MAIN_MENU:
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    self.selected_option = (self.selected_option - 1) % len(self.menu_options)
-                    self.audio_engine.play_sound('click')
-                elif event.key == pygame.K_DOWN:
-                    self.selected_option = (self.selected_option + 1) % len(self.menu_options)
-                    self.audio_engine.play_sound('click')
-                elif event.key == pygame.K_RETURN:
-                    self.select_menu_option()
-        
-        elif self.state == PLAYING:
-            self.level_manager.handle_event(event)
+        
+        handler = self.event_handlers.get(self.state)
+        if handler is not None:
+            handler(event)
+    
+    def handle_intro_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+            self.start_transition(INTRO, MAIN_MENU)
+            self.audio_engine.play_sound('click')
+    
+    def handle_menu_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_UP:
+                self.selected_option = (self.selected_option - 1) % self.num_menu_options
+                self.play_menu_click()
+            elif event.key == pygame.K_DOWN:
+                self.selected_option = (self.selected_option + 1) % self.num_menu_options
+                self.play_menu_click()
+            elif event.key == pygame.K_RETURN:
+                self.select_menu_option()
+    
+    def play_menu_click(self):
+        """Play the navigation click, at most once every 50ms so held or mashed keys don't flood the mixer"""
+        if self.frame_tick - self.last_click_time >= 50:
+            self.audio_engine.play_sound('click')
+            self.last_click_time = self.frame_tick
     
     def select_menu_option(self):
         if self.menu_options[self.selected_option] == "Start Game":
@@ -148,7 +228,7 @@ class Game:
     def start_transition(self, from_state, to_state):
         """Start a transition between game states"""
         self.transition_active = True
-        self.transition_start_time = pygame.time.get_ticks()
+        self.transition_start_time = self.frame_tick
         self.transition_from_state = from_state
         self.transition_to_state = to_state
     
@@ -157,7 +237,7 @@ class Game:
         if not self.transition_active:
             return
             
-        elapsed = pygame.time.get_ticks() - self.transition_start_time
+        elapsed = self.frame_tick - self.transition_start_time
         progress = elapsed / self.transition_duration
         
         if progress < 0.5:
@@ -183,11 +263,11 @@ class Game:
         self.update_transition()
         
         # Update matrix effect background with occasional glitches
-        self.matrix_effect.update()
+        self.matrix_effect.update(self.frame_tick)
         
-        # Randomly trigger glitch effects for more visual interest
+        # Randomly trigger glitch effects for more visual interest (drawn by the next render)
         if random.random() < 0.01 and self.state != INTRO:  # 1% chance per frame
-            self.matrix_effect.render_glitch(screen, 0.2)
+            self.matrix_effect.force_glitch_next_frame = True
         
         if not self.transition_active:
             if self.state == INTRO:
@@ -197,13 +277,13 @@ class Game:
     
     def update_intro(self):
         # Auto-progress intro after 10 seconds
-        if time.time() - self.intro_start_time > 10:
+        if self.frame_tick - self.intro_start_time > 10000:
             self.start_transition(INTRO, MAIN_MENU)
             return
             
         # Typewriter effect for ASCII art
         if not self.intro_complete:
-            if self.intro_line_index < len(self.intro_text):
+            if self.intro_line_index < self.num_intro_lines:
                 if self.intro_char_index < len(self.intro_text[self.intro_line_index]):
                     self.intro_display_text[self.intro_line_index] = self.intro_text[self.intro_line_index][:self.intro_char_index+1]
                     self.intro_char_index += 1
@@ -215,86 +295,109 @@ class Game:
                 self.intro_progress = 100
     
     def render(self):
-        screen.fill(BLACK)
+        # Levels with an opaque background repaint every pixel, so skip the layers they hide
+        covered = self.state == PLAYING and not self.transition_active and self.level_manager.covers_screen()
+        
+        # Near the middle of a transition the black overlay is (almost) opaque, so the frame is just black
+        hidden = self.transition_active and self.transition_alpha >= 250
+        
+        if not covered:
+            screen.fill(BLACK)
         
         # Draw matrix effect as background for all states except intro
-        if self.state != INTRO:
+        if not covered and self.state != INTRO and not hidden:
             # Use glitch effect during transitions
             if self.transition_active:
                 self.matrix_effect.render_glitch(screen, 0.2)
+            elif self.matrix_effect.force_glitch_next_frame:
+                self.matrix_effect.render_glitch(screen, alpha=64)
             else:
                 self.matrix_effect.render(screen, 64)  # Lower alpha for background
+        else:
+            # A glitch requested for a frame without the matrix is dropped, not saved for later
+            self.matrix_effect.force_glitch_next_frame = False
         
-        if self.state == INTRO:
-            self.render_intro()
-        elif self.state == MAIN_MENU:
-            self.render_main_menu()
-        elif self.state == PLAYING:
-            self.level_manager.render(screen)
+        if not hidden:
+            if self.state == INTRO:
+                self.render_intro()
+            elif self.state == MAIN_MENU:
+                self.render_main_menu()
+            elif self.state == PLAYING:
+                self.level_manager.render(screen)
         
         # Draw transition overlay
-        if self.transition_active:
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, self.transition_alpha))
-            screen.blit(overlay, (0, 0))
+        if self.transition_active and not hidden:
+            self.transition_overlay.set_alpha(self.transition_alpha)
+            screen.blit(self.transition_overlay, (0, 0))
         
         # Draw FPS counter if enabled
         if self.show_fps and self.frame_times:
-            avg_frame_time = sum(self.frame_times) / len(self.frame_times)
+            avg_frame_time = self.frame_time_sum / len(self.frame_times)
             fps = 1.0 / max(avg_frame_time, 0.001)  # Avoid division by zero
             fps_text = self.font.render(f"FPS: {int(fps)}", True, GREEN)
             screen.blit(fps_text, (SCREEN_WIDTH - fps_text.get_width() - 10, 10))
         
-        pygame.display.flip()
+        # The matrix background animates the whole screen, but the intro and the opaque
+        # puzzles only change a few areas once they are on screen, so just those are pushed
+        rects = None
+        if covered:
+            # Asked every frame so the level's change tracking stays in step with what is shown
+            rects = self.level_manager.take_dirty_rects()
+        elif self.state == INTRO and not self.transition_active:
+            rects = [self.intro_rect]
+        
+        frame_key = (self.state, self.transition_active, covered, self.level_manager.current_level)
+        if rects is None or frame_key != self.last_frame_key:
+            pygame.display.flip()
+        else:
+            rects.append(self.fps_rect)
+            pygame.display.update(rects)
+        self.last_frame_key = frame_key
     
     def render_intro(self):
         # Draw ASCII art with typewriter effect
-        y_offset = SCREEN_HEIGHT // 2 - (len(self.intro_text) * 20) // 2
+        y_offset = self.intro_rect.y
         
         for i, line in enumerate(self.intro_display_text):
             # Add glitch effect
-            glitch_line = line
             if random.random() < 0.05 and line:  # 5% chance of glitch
                 glitch_pos = random.randint(0, len(line)-1)
                 glitch_char = chr(random.randint(33, 126))
                 glitch_line = line[:glitch_pos] + glitch_char + line[glitch_pos+1:]
-            
-            text_surface = self.font.render(glitch_line, True, GREEN)
+                
+                # Glitched lines are one-offs, so they are not cached
+                text_surface = self.font.render(glitch_line, True, GREEN)
+            else:
+                cached = self.intro_line_surfs[i]
+                if cached is None or cached[0] != line:
+                    cached = (line, self.font.render(line, True, GREEN).convert_alpha())
+                    self.intro_line_surfs[i] = cached
+                text_surface = cached[1]
             screen.blit(text_surface, (SCREEN_WIDTH // 2 - text_surface.get_width() // 2, y_offset + i * 20))
         
         # Press Enter to continue
         if self.intro_progress >= 80:
-            press_enter = self.font.render("Press ENTER to continue...", True, 
-                                          GREEN if pygame.time.get_ticks() % 1000 < 500 else BLACK)
+            press_enter = self.press_enter_surfs[0 if self.frame_tick % 1000 < 500 else 1]
             screen.blit(press_enter, (SCREEN_WIDTH // 2 - press_enter.get_width() // 2, 
-                                     y_offset + len(self.intro_text) * 20 + 40))
+                                     y_offset + self.num_intro_lines * 20 + 40))
     
     def render_main_menu(self):
         # Draw title
-        title = self.title_font.render("CypherCore", True, BRIGHT_GREEN)
+        title = self.menu_title_surf
         screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 100))
         
         # Draw subtitle
-        subtitle = self.font.render("A Cyberpunk Puzzle Adventure", True, GREEN)
+        subtitle = self.menu_subtitle_surf
         screen.blit(subtitle, (SCREEN_WIDTH // 2 - subtitle.get_width() // 2, 160))
         
-        # Draw menu options
+        # Draw menu options, using the selected variant for the highlighted one
         y_offset = 250
-        for i, option in enumerate(self.menu_options):
-            if i == self.selected_option:
-                # Selected option
-                color = BRIGHT_GREEN
-                option_text = f"> {option} <"
-            else:
-                # Unselected option
-                color = GREEN
-                option_text = option
-            
-            text = self.font.render(option_text, True, color)
+        for i, (unselected, selected) in enumerate(self.menu_option_surfs):
+            text = selected if i == self.selected_option else unselected
             screen.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, y_offset + i * 40))
         
         # Draw footer
-        footer = self.font.render("Use arrow keys to navigate, ENTER to select", True, GREEN)
+        footer = self.menu_footer_surf
         screen.blit(footer, (SCREEN_WIDTH // 2 - footer.get_width() // 2, SCREEN_HEIGHT - 50))
 
 # Run the game
@@ -1,16 +1,22 @@
 import pygame
 import random
+import numpy as np
 
 class MatrixEffect:
     """
     Creates a Matrix-style falling character effect for the background
     """
+    # Longest stream, in characters
+    MAX_STREAM_LENGTH = 30
+    
+    # Shared generator for stream state
+    _rng = np.random.default_rng()
+    
     def __init__(self, screen_width, screen_height):
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.font = pygame.font.SysFont('consolas', 14)
         self.chars = "01010101010101010101010101010101"
-        self.streams = []
         self.density = 1.0  # Density factor (1.0 = normal, higher = more streams)
         self.color_scheme = "cyan_purple"  # Default color scheme
         self.message_display = False
@@ -18,35 +24,46 @@ class MatrixEffect:
         self.message_duration = 5000  # 5 seconds
         self.message_interval = 15000  # 15 seconds between messages
         self.last_message_time = 0
+        self.message_font = pygame.font.SysFont('consolas', 40)
+        
+        # Rendered glyphs keyed by (char, brightness, alpha), and the message composited with its glow;
+        # both are filled on first use and cleared when the color scheme changes
+        self.glyph_cache = {}
+        self.message_surface = None
+        
+        # Size of one character cell, used to size the pre-composited stream columns
+        self.char_width = max(self.font.size(char)[0] for char in set(self.chars))
+        self.char_height = self.font.get_height()
+        
+        # Scratch surfaces reused by render_glitch for displaced strips and color tints
+        self.glitch_row = pygame.Surface((screen_width, 8))
+        self.glitch_column = pygame.Surface((8, screen_height))
+        self.glitch_tint = pygame.Surface((screen_width, screen_height))
+        self.glitch_tint.set_alpha(30)
+        
+        # Set to make the next render_glitch call glitch regardless of its intensity
+        self.force_glitch_next_frame = False
         self.setup_streams()
         
     def setup_streams(self):
         # Create character streams
-        self.streams = []
         stream_spacing = 20  # Space streams every 20 pixels
         
         # Calculate number of streams based on density
         num_streams = int((self.screen_width / stream_spacing) * self.density)
         
-        for i in range(num_streams):
-            # Calculate x position with even spacing
-            x = int(i * (self.screen_width / num_streams))
-            
-            # Each stream has: x position, y position, speed, characters
-            stream = {
-                'x': x,
-                'y': random.randint(-100, 0),
-                'speed': random.randint(5, 15),
-                'length': random.randint(5, 30),
-                'chars': []
-            }
-            
-            # Generate random characters for this stream
-            for j in range(stream['length']):
-                char_index = random.randint(0, len(self.chars) - 1)
-                stream['chars'].append(self.chars[char_index])
-            
-            self.streams.append(stream)
+        # Stream state is kept in parallel arrays, one entry per stream:
+        # x position (evenly spaced), y position, speed and length
+        self.xs = (np.arange(num_streams) * (self.screen_width / num_streams)).astype(np.int32)
+        self.ys = self._rng.integers(-100, 0, num_streams, endpoint=True).astype(np.float64)
+        self.speeds = self._rng.integers(5, 15, num_streams, endpoint=True)
+        self.lengths = self._rng.integers(5, self.MAX_STREAM_LENGTH, num_streams, endpoint=True)
+        
+        # Indices into self.chars; each row only uses its first lengths[i] entries
+        self.char_indices = self._rng.integers(0, len(self.chars), (num_streams, self.MAX_STREAM_LENGTH), dtype=np.uint8)
+        
+        # Each stream's characters composited into one surface per alpha (rebuilt when they change)
+        self.columns = [{} for _ in range(num_streams)]
     
     def set_density(self, density):
         """Change the density of the matrix effect and regenerate streams"""
@@ -56,6 +73,19 @@ class MatrixEffect:
     def set_color_scheme(self, scheme):
         """Set the color scheme for the matrix effect"""
         self.color_scheme = scheme
+        self.glyph_cache = {}
+        self.message_surface = None
+        for columns in self.columns:
+            columns.clear()
+    
+    def get_glyph(self, char, brightness, alpha):
+        """Get a rendered character, rasterizing it only the first time it is needed"""
+        key = (char, brightness, alpha)
+        glyph = self.glyph_cache.get(key)
+        if glyph is None:
+            glyph = self.font.render(char, True, self.get_color(brightness, alpha)).convert_alpha()
+            self.glyph_cache[key] = glyph
+        return glyph
     
     def get_color(self, brightness, alpha=255):
         """Get color based on the current color scheme and brightness"""
@@ -73,25 +103,48 @@ class MatrixEffect:
             # Default to green
             return (0, brightness, 0, alpha)
     
-    def update(self):
-        # Update each stream's position
-        for stream in self.streams:
-            stream['y'] += stream['speed'] / 10
+    def build_column(self, index, alpha):
+        """Composite a stream's characters, top to bottom, into a single surface"""
+        length = int(self.lengths[index])
+        height = (length - 1) * 15 + self.char_height
+        column = pygame.Surface((self.char_width, height), pygame.SRCALPHA).convert_alpha()
+        for i, char_index in enumerate(self.char_indices[index, :length].tolist()):
+            # Fade brightness based on position in stream
+            brightness = 255 - (i * (255 // max(1, length)))
             
-            # If stream is off screen, reset it
-            if stream['y'] > self.screen_height:
-                stream['y'] = random.randint(-200, -50)
-                stream['speed'] = random.randint(5, 15)
-                
-            # Randomly change characters
-            if random.random() < 0.02:  # 2% chance per frame
-                for i in range(len(stream['chars'])):
-                    if random.random() < 0.1:  # 10% chance per character
-                        char_index = random.randint(0, len(self.chars) - 1)
-                        stream['chars'][i] = self.chars[char_index]
+            # First character is brighter
+            if i == 0:
+                brightness = 255
+            
+            column.blit(self.get_glyph(self.chars[char_index], brightness, alpha), (0, i * 15))
+        return column
+    
+    def update(self, current_time=None):
+        # current_time lets the caller share one clock sample per frame
+        if current_time is None:
+            current_time = pygame.time.get_ticks()
+        
+        # Update every stream's position at once
+        self.ys += self.speeds / 10
+        
+        # Reset streams that went off screen
+        wrapped = self.ys > self.screen_height
+        num_wrapped = np.count_nonzero(wrapped)
+        if num_wrapped:
+            self.ys[wrapped] = self._rng.integers(-200, -50, num_wrapped, endpoint=True)
+            self.speeds[wrapped] = self._rng.integers(5, 15, num_wrapped, endpoint=True)
+        
+        # Randomly change characters: 2% chance per stream per frame, then 10% per character
+        changed = np.flatnonzero(self._rng.random(len(self.ys)) < 0.02)
+        if len(changed):
+            rows = self.char_indices[changed]
+            replace = self._rng.random(rows.shape) < 0.1
+            rows[replace] = self._rng.integers(0, len(self.chars), np.count_nonzero(replace))
+            self.char_indices[changed] = rows
+            for index in changed.tolist():
+                self.columns[index].clear()
         
         # Check if it's time to display a message
-        current_time = pygame.time.get_ticks()
         if not self.message_display and current_time - self.last_message_time > self.message_interval:
             self.message_display = True
             self.message_time = current_time
@@ -101,111 +154,96 @@ class MatrixEffect:
         if self.message_display and current_time - self.message_time > self.message_duration:
             self.message_display = False
     
-    def render(self, surface, alpha=128):
-        # Create a transparent surface for the matrix effect
-        matrix_surface = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
+    def build_message(self):
+        """Composite the "CypherCore" message and its glow into one surface"""
+        message = "CypherCore"
+        glow_size = 3
+        text_surface = self.message_font.render(message, True, self.get_color(255, 200))
         
-        # Draw each stream
-        for stream in self.streams:
-            for i, char in enumerate(stream['chars']):
-                y_pos = int(stream['y']) + i * 15
-                
-                # Only draw if on screen
-                if 0 <= y_pos < self.screen_height:
-                    # Fade brightness based on position in stream
-                    brightness = 255 - (i * (255 // max(1, stream['length'])))
-                    color = self.get_color(brightness, alpha)
-                    
-                    # First character is brighter
-                    if i == 0:
-                        bright_color = self.get_color(255, alpha)
-                        color = bright_color
-                    
-                    char_surface = self.font.render(char, True, color)
-                    matrix_surface.blit(char_surface, (stream['x'], y_pos))
+        # Pad the text on every side so the glow offsets stay inside the surface
+        message_surface = pygame.Surface(
+            (text_surface.get_width() + glow_size * 2, text_surface.get_height() + glow_size * 2),
+            pygame.SRCALPHA
+        )
+        
+        # Add a subtle glow effect
+        for offset in range(1, glow_size + 1):
+            glow_alpha = 100 - (offset * 30)
+            glow_surface = self.message_font.render(message, True, self.get_color(255, glow_alpha))
+            message_surface.blit(glow_surface, (glow_size - offset, glow_size))
+            message_surface.blit(glow_surface, (glow_size + offset, glow_size))
+            message_surface.blit(glow_surface, (glow_size, glow_size - offset))
+            message_surface.blit(glow_surface, (glow_size, glow_size + offset))
+        
+        # Draw the main message
+        message_surface.blit(text_surface, (glow_size, glow_size))
+        return message_surface.convert_alpha()
+    
+    def render(self, surface, alpha=128):
+        # Draw each stream as one pre-composited column straight onto the target
+        # (the blit clips it to the screen)
+        blit_list = []
+        positions = zip(self.xs.tolist(), self.ys.astype(np.int32).tolist())
+        for index, (columns, position) in enumerate(zip(self.columns, positions)):
+            column = columns.get(alpha)
+            if column is None:
+                column = self.build_column(index, alpha)
+                columns[alpha] = column
+            blit_list.append((column, position))
+        surface.blits(blit_list, doreturn=0)
         
         # Draw "CypherCore" message periodically
         if self.message_display:
-            message = "CypherCore"
-            message_font = pygame.font.SysFont('consolas', 40)
+            if self.message_surface is None:
+                self.message_surface = self.build_message()
             
             # Calculate position to center the message
-            message_surface = message_font.render(message, True, self.get_color(255, 200))
-            message_x = self.screen_width // 2 - message_surface.get_width() // 2
-            message_y = self.screen_height // 2 - message_surface.get_height() // 2
-            
-            # Add a subtle glow effect
-            glow_size = 3
-            for offset in range(1, glow_size + 1):
-                glow_alpha = 100 - (offset * 30)
-                glow_surface = message_font.render(message, True, self.get_color(255, glow_alpha))
-                matrix_surface.blit(glow_surface, (message_x - offset, message_y))
-                matrix_surface.blit(glow_surface, (message_x + offset, message_y))
-                matrix_surface.blit(glow_surface, (message_x, message_y - offset))
-                matrix_surface.blit(glow_surface, (message_x, message_y + offset))
-            
-            # Draw the main message
-            matrix_surface.blit(message_surface, (message_x, message_y))
+            message_x = self.screen_width // 2 - self.message_surface.get_width() // 2
+            message_y = self.screen_height // 2 - self.message_surface.get_height() // 2
+            surface.blit(self.message_surface, (message_x, message_y))
         
-        # Blit the matrix surface onto the main surface
-        surface.blit(matrix_surface, (0, 0))
-        
-    def render_glitch(self, surface, glitch_intensity=0.05):
+    def render_glitch(self, surface, glitch_intensity=0.05, alpha=128):
         """Render the matrix effect with occasional glitches"""
         # First render the normal matrix effect
-        self.render(surface)
+        self.render(surface, alpha)
         
         # Add random glitch effects
-        if random.random() < glitch_intensity:
+        forced = self.force_glitch_next_frame
+        self.force_glitch_next_frame = False
+        if forced or random.random() < glitch_intensity:
             # Create horizontal glitch lines
             num_lines = random.randint(1, 5)
             for _ in range(num_lines):
                 y = random.randint(0, self.screen_height - 10)  # Ensure within bounds
-                height = random.randint(2, 8)
+                # Make sure the strip stays within bounds
+                height = min(random.randint(2, 8), self.screen_height - y)
                 offset = random.randint(-10, 10)
                 
-                # Make sure the rectangle is within bounds
-                if y + height > self.screen_height:
-                    height = self.screen_height - y
-                
-                # Get a portion of the screen
-                try:
-                    line_rect = pygame.Rect(0, y, self.screen_width, height)
-                    line_surface = surface.subsurface(line_rect).copy()
-                    
-                    # Draw it with offset
-                    surface.blit(line_surface, (offset, y))
-                except ValueError:
-                    # Skip if out of bounds
-                    pass
+                # Copy a strip of the screen into the scratch surface and draw it with offset
+                line_rect = pygame.Rect(0, y, self.screen_width, height)
+                self.glitch_row.blit(surface, (0, 0), line_rect)
+                surface.blit(self.glitch_row, (offset, y), (0, 0, self.screen_width, height))
             
             # Increased chance of color distortion with more purple tones
             if random.random() < 0.5:  # Increased from 0.3 to 0.5
-                glitch_surface = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
                 # More purple-focused color options
                 color = random.choice([
-                    (255, 0, 255, 30),  # Magenta
-                    (180, 0, 255, 30),  # Purple
-                    (100, 0, 255, 30),  # Deep purple
-                    (255, 0, 128, 30)   # Pink-purple
+                    (255, 0, 255),  # Magenta
+                    (180, 0, 255),  # Purple
+                    (100, 0, 255),  # Deep purple
+                    (255, 0, 128)   # Pink-purple
                 ])
-                glitch_surface.fill(color)
-                surface.blit(glitch_surface, (0, 0))
+                self.glitch_tint.fill(color)
+                surface.blit(self.glitch_tint, (0, 0))
                 
             # Occasionally add vertical glitch lines for more effect
             if random.random() < 0.3:
                 num_v_lines = random.randint(1, 3)
                 for _ in range(num_v_lines):
                     x = random.randint(0, self.screen_width - 10)
-                    width = random.randint(2, 8)
+                    width = min(random.randint(2, 8), self.screen_width - x)
                     offset = random.randint(-10, 10)
                     
-                    if x + width > self.screen_width:
-                        width = self.screen_width - x
-                    
-                    try:
-                        v_line_rect = pygame.Rect(x, 0, width, self.screen_height)
-                        v_line_surface = surface.subsurface(v_line_rect).copy()
-                        surface.blit(v_line_surface, (x, offset))
-                    except ValueError:
-                        pass
+                    v_line_rect = pygame.Rect(x, 0, width, self.screen_height)
+                    self.glitch_column.blit(surface, (0, 0), v_line_rect)
+                    surface.blit(self.glitch_column, (x, offset), (0, 0, width, self.screen_height))